@@ -3,11 +3,12 @@ from typing import Annotated, Any, Callable, Literal
 
 from fastapi import Depends, HTTPException, Path
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from dependencies import get_session
+from auth.models import Principal
+from dependencies import get_async_session, get_session
 from item.models import Item
-from user.dependencies import get_active_user
-from user.models import User, UserSafe
+from user.dependencies import get_active_principal, get_active_principal_async
 
 
 class HasPermissions:
@@ -24,15 +25,20 @@ class HasPermissions:
     def __call__(
         self,
         session: Annotated[Session, Depends(get_session)],
-        current_user: Annotated[UserSafe, Depends(get_active_user)],
+        principal: Annotated[Principal, Depends(get_active_principal)],
         object_id: int | None = None,
     ):
         try:
-            user: User | None = session.get(User, current_user.id)
-            if user:
-                db_object: Any | None = session.get(self.object_model, object_id)
-                if self.has_valid_roles(user) or self.is_owner(user, db_object):
-                    return current_user
+            if self.has_valid_roles(principal):
+                return principal
+            # Only fetch the object when ownership decides the outcome
+            db_object: Any | None = (
+                session.get(self.object_model, object_id)
+                if object_id is not None
+                else None
+            )
+            if self.is_owner(principal, db_object):
+                return principal
             raise HTTPException(status_code=403, detail='Not enough permissions.')
         except HTTPException as error:
             raise error
@@ -42,11 +48,41 @@ class HasPermissions:
                 status_code=400, detail='Error fetching object.'
             ) from error
 
-    def has_valid_roles(self, user: User):
-        return bool(not self.valid_roles or user.group.name in self.valid_roles)
+    def has_valid_roles(self, principal: Principal):
+        return bool(not self.valid_roles or principal.group_name in self.valid_roles)
 
-    def is_owner(self, user: User, db_object: Any):
+    def is_owner(self, principal: Principal, db_object: Any):
+        # Compares the foreign key so the owner is not lazy loaded
         return bool(
             not self.check_owner
-            or (hasattr(db_object, 'owner') and db_object.owner.id == user.id)
+            or (hasattr(db_object, 'owner_id') and db_object.owner_id == principal.id)
         )
+
+
+class AsyncHasPermissions(HasPermissions):
+    """HasPermissions counterpart for routers running on the async session."""
+
+    async def __call__(  # type: ignore[override]
+        self,
+        session: Annotated[AsyncSession, Depends(get_async_session)],
+        principal: Annotated[Principal, Depends(get_active_principal_async)],
+        object_id: int | None = None,
+    ):
+        try:
+            if self.has_valid_roles(principal):
+                return principal
+            db_object: Any | None = (
+                await session.get(self.object_model, object_id)
+                if object_id is not None
+                else None
+            )
+            if self.is_owner(principal, db_object):
+                return principal
+            raise HTTPException(status_code=403, detail='Not enough permissions.')
+        except HTTPException as error:
+            raise error
+        except Exception as error:
+            print(error)
+            raise HTTPException(
+                status_code=400, detail='Error fetching object.'
+            ) from error
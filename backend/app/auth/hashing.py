@@ -0,0 +1,156 @@
+"""Password hashing off the event loop on a bounded executor."""
+
+import asyncio
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import cache
+from threading import Lock
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable
+
+from decouple import config
+from fastapi import HTTPException, status
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+# 'thread' works because bcrypt releases the GIL, 'process' isolates it fully
+HASH_EXECUTOR = config('HASH_EXECUTOR', default='thread')
+HASH_WORKERS = config('HASH_WORKERS', default=os.cpu_count() or 1, cast=int)
+# Hash operations queued or running before new ones are rejected
+HASH_MAX_PENDING = config('HASH_MAX_PENDING', default=64, cast=int)
+
+
+hasher_overloaded_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail='Too many password operations, try again later.',
+    headers={'Retry-After': '1'},
+)
+
+
+@cache
+def get_pwd_context() -> 'CryptContext':
+    """Built on the first hash, passlib and its bcrypt backend load slowly."""
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=['bcrypt'], deprecated='auto')
+
+
+def hash_password(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def run_timed(func: Callable, *args: Any) -> tuple[Any, float]:
+    """Runs func in the worker and returns its result with the run time."""
+    started = perf_counter()
+    result = func(*args)
+    return result, perf_counter() - started
+
+
+class PasswordHasher:
+    """Runs hash operations on a size bounded executor with metrics."""
+
+    def __init__(self, kind: str, workers: int, max_pending: int) -> None:
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queue_seconds = 0.0
+        self.run_seconds = 0.0
+        self._executor: Executor | None = None
+        self._lock = Lock()
+
+    @property
+    def executor(self) -> Executor:
+        # Created on first use so forked workers never inherit its threads
+        with self._lock:
+            if self._executor is None:
+                executor_class = (
+                    ProcessPoolExecutor
+                    if self.kind == 'process'
+                    else ThreadPoolExecutor
+                )
+                self._executor = executor_class(max_workers=self.workers)
+            return self._executor
+
+    def submit(self, func: Callable, *args: Any) -> Future:
+        """Queues func, raising a 503 when the pending limit is reached."""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise hasher_overloaded_exception
+            self.pending += 1
+            self.submitted += 1
+        submitted_at = perf_counter()
+        future = self.executor.submit(run_timed, func, *args)
+        future.add_done_callback(lambda done: self._on_done(done, submitted_at))
+        return future
+
+    def _on_done(self, future: Future, submitted_at: float) -> None:
+        elapsed = perf_counter() - submitted_at
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+                return
+            run_seconds = future.result()[1]
+            self.completed += 1
+            self.run_seconds += run_seconds
+            self.queue_seconds += max(elapsed - run_seconds, 0.0)
+
+    async def hash(self, password: str) -> str:
+        """Hashes a password without blocking the event loop."""
+        result, _ = await asyncio.wrap_future(self.submit(hash_password, password))
+        return result
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verifies a password without blocking the event loop."""
+        result, _ = await asyncio.wrap_future(
+            self.submit(check_password, plain_password, hashed_password)
+        )
+        return result
+
+    def hash_blocking(self, password: str) -> str:
+        """Hashes a password from a threadpool route, bounded like hash()."""
+        return self.submit(hash_password, password).result()[0]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def reset_after_fork(self) -> None:
+        """Drops the executor and lock of the parent, their threads are gone."""
+        self._lock = Lock()
+        self._executor = None
+        self.pending = 0
+
+    def as_dict(self) -> dict[str, int | float | str]:
+        """Returns queue depth and timing counters for monitoring."""
+        with self._lock:
+            return {
+                'executor': self.kind,
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'queue_seconds': round(self.queue_seconds, 6),
+                'run_seconds': round(self.run_seconds, 6),
+            }
+
+
+password_hasher = PasswordHasher(
+    kind=HASH_EXECUTOR, workers=HASH_WORKERS, max_pending=HASH_MAX_PENDING
+)
@@ -0,0 +1,197 @@
+"""Admission control for the authentication routes.
+
+Every attempt takes a token from a bucket of its client IP and, for logins,
+of the username, and logins also need one of a fixed number of password
+check slots. All of it is decided before the session is used or a hash is
+computed, so a burst of bad logins cannot tie up the hasher or the DB.
+"""
+
+import math
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from decouple import config
+from fastapi import HTTPException, Request, status
+
+from auth.hashing import HASH_WORKERS
+from monitoring.metrics import request_metrics
+
+AUTH_RATE_LIMIT_ENABLED = config('AUTH_RATE_LIMIT_ENABLED', default=True, cast=bool)
+# Attempts allowed at once, then refilled at the per minute rate
+AUTH_IP_BURST = config('AUTH_IP_BURST', default=20, cast=int)
+AUTH_IP_PER_MINUTE = config('AUTH_IP_PER_MINUTE', default=30, cast=float)
+AUTH_USERNAME_BURST = config('AUTH_USERNAME_BURST', default=5, cast=int)
+AUTH_USERNAME_PER_MINUTE = config('AUTH_USERNAME_PER_MINUTE', default=10, cast=float)
+# Buckets kept per limiter, the least recently used are dropped beyond it
+AUTH_RATE_LIMIT_KEYS = config('AUTH_RATE_LIMIT_KEYS', default=10000, cast=int)
+# Header holding the client address set by the edge, e.g. True-Client-IP or
+# X-Forwarded-For, empty to use the address of the connection
+AUTH_CLIENT_IP_HEADER = config('AUTH_CLIENT_IP_HEADER', default='')
+# Logins past the DB lookup at once, further ones are rejected without waiting
+AUTH_MAX_CONCURRENT_HASHES = config(
+    'AUTH_MAX_CONCURRENT_HASHES', default=HASH_WORKERS * 2, cast=int
+)
+MAX_USERNAME_KEY_LENGTH = 150
+
+
+class TokenBucketLimiter:
+    """Token buckets keyed by string, bounded to max_size keys.
+
+    A bucket left alone for burst / rate seconds is full again, so dropping
+    the least recently used ones only forgets clients that went quiet.
+    """
+
+    def __init__(self, burst: int, per_minute: float, max_size: int) -> None:
+        self.burst = burst
+        self.rate = per_minute / 60
+        self.max_size = max_size
+        self.allowed = 0
+        self.limited = 0
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = Lock()
+
+    def acquire(self, key: str) -> float:
+        """Takes a token, returning 0 or the seconds until one is available."""
+        now = monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+                self.allowed += 1
+            else:
+                wait = (1 - tokens) / self.rate if self.rate > 0 else math.inf
+                self.limited += 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def as_dict(self) -> dict[str, int | float]:
+        with self._lock:
+            return {
+                'keys': len(self._buckets),
+                'max_size': self.max_size,
+                'burst': self.burst,
+                'per_minute': round(self.rate * 60, 3),
+                'allowed': self.allowed,
+                'limited': self.limited,
+            }
+
+
+class ConcurrencyLimit:
+    """Counts operations in progress and refuses new ones past the limit."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.in_progress = 0
+        self.rejected = 0
+        self._lock = Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_progress >= self.limit:
+                self.rejected += 1
+                return False
+            self.in_progress += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_progress -= 1
+
+    def as_dict(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'in_progress': self.in_progress,
+                'rejected': self.rejected,
+            }
+
+
+ip_limiter = TokenBucketLimiter(
+    burst=AUTH_IP_BURST, per_minute=AUTH_IP_PER_MINUTE, max_size=AUTH_RATE_LIMIT_KEYS
+)
+username_limiter = TokenBucketLimiter(
+    burst=AUTH_USERNAME_BURST,
+    per_minute=AUTH_USERNAME_PER_MINUTE,
+    max_size=AUTH_RATE_LIMIT_KEYS,
+)
+password_checks = ConcurrencyLimit(AUTH_MAX_CONCURRENT_HASHES)
+
+
+def client_ip(request: Request) -> str:
+    if AUTH_CLIENT_IP_HEADER:
+        forwarded = request.headers.get(AUTH_CLIENT_IP_HEADER)
+        if forwarded:
+            # The first address of X-Forwarded-For is the original client
+            return forwarded.split(',')[0].strip()
+    return request.client.host if request.client else 'unknown'
+
+
+def too_many_attempts(wait: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail='Too many attempts, try again later.',
+        headers={'Retry-After': str(max(1, math.ceil(min(wait, 86400))))},
+    )
+
+
+async def limit_auth_attempts(request: Request) -> None:
+    """Rejects with 429 once the client IP or the username is out of tokens.
+
+    The username comes from the login form, which FastAPI parses anyway and
+    Starlette caches on the request.
+    """
+    if not AUTH_RATE_LIMIT_ENABLED:
+        return
+    wait = ip_limiter.acquire(f'{request.url.path} {client_ip(request)}')
+    if wait:
+        request_metrics.shed_request('auth_ip')
+        raise too_many_attempts(wait)
+    content_type = request.headers.get('content-type', '')
+    if not content_type.startswith(
+        ('application/x-www-form-urlencoded', 'multipart/form-data')
+    ):
+        return
+    username = (await request.form()).get('username')
+    if not isinstance(username, str) or not username:
+        return
+    wait = username_limiter.acquire(username.lower()[:MAX_USERNAME_KEY_LENGTH])
+    if wait:
+        request_metrics.shed_request('auth_username')
+        raise too_many_attempts(wait)
+
+
+async def admit_password_check():
+    """Holds a password check slot for the request, 503 when none is free."""
+    if not AUTH_RATE_LIMIT_ENABLED:
+        yield
+        return
+    if not password_checks.try_acquire():
+        request_metrics.shed_request('auth_concurrency')
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Too many password operations, try again later.',
+            headers={'Retry-After': '1'},
+        )
+    try:
+        yield
+    finally:
+        password_checks.release()
+
+
+def limits_as_dict() -> dict[str, dict[str, int | float] | bool]:
+    return {
+        'enabled': AUTH_RATE_LIMIT_ENABLED,
+        'ip': ip_limiter.as_dict(),
+        'username': username_limiter.as_dict(),
+        'password_checks': password_checks.as_dict(),
+    }
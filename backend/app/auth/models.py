@@ -1,4 +1,7 @@
+from typing import Any
+
 from pydantic import BaseModel
+from sqlmodel import Field, SQLModel
 
 
 class Token(BaseModel):
@@ -8,3 +11,36 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: str | None = None
+    user_id: int | None = None
+    group_id: int | None = None
+    role: str | None = None
+
+
+class RevokedToken(SQLModel, table=True):
+    """A refresh token that may no longer be used, kept until it expires."""
+
+    jti: str = Field(primary_key=True, max_length=32)
+    # Unix times, expires_at is the exp claim of the token
+    expires_at: int = Field(index=True)
+    revoked_at: float = Field(index=True)
+
+
+class Principal(BaseModel):
+    """Authenticated identity used for permission checks."""
+
+    id: int
+    username: str
+    disabled: bool = False
+    group_id: int | None = None
+    group_name: str | None = None
+
+    @classmethod
+    def from_user(cls, user: Any) -> 'Principal':
+        """Builds a principal from a DB user with its group loaded."""
+        return cls(
+            id=user.id,
+            username=user.username,
+            disabled=user.disabled,
+            group_id=user.group_id,
+            group_name=user.group.name if user.group else None,
+        )
@@ -0,0 +1,146 @@
+"""Revoked refresh tokens, held in memory and persisted in SQLite.
+
+Revoked jtis are grouped in sets by the hour their token expires, so a
+check is one dict and one set lookup with the exp claim of the token, and
+compaction drops whole hours once they are past. Other worker processes
+revoke tokens too, so the rows revoked since the last sync are loaded at
+most every REVOCATION_SYNC_INTERVAL seconds.
+"""
+
+from threading import Lock
+from time import monotonic, time
+
+from decouple import config
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from auth.models import RevokedToken
+
+# Issues a new refresh token on every refresh and revokes the one used
+REFRESH_TOKEN_ROTATION = config('REFRESH_TOKEN_ROTATION', default=True, cast=bool)
+REVOCATION_SYNC_INTERVAL = config('REVOCATION_SYNC_INTERVAL', default=5, cast=float)
+REVOCATION_COMPACT_INTERVAL = config(
+    'REVOCATION_COMPACT_INTERVAL', default=3600, cast=float
+)
+BUCKET_SECONDS = 3600
+
+
+class RevocationStore:
+    """Sets of revoked jtis keyed by the hour their token expires."""
+
+    def __init__(self, sync_interval: float, compact_interval: float) -> None:
+        self.sync_interval = sync_interval
+        self.compact_interval = compact_interval
+        self.revoked = 0
+        self.rejected = 0
+        self.compacted = 0
+        self._buckets: dict[int, set[str]] = {}
+        # revoked_at of the newest row loaded, rows from then on are reloaded
+        self._synced_until = 0.0
+        self._synced_at: float | None = None
+        self._compacted_at = monotonic()
+        self._lock = Lock()
+
+    def is_revoked(self, jti: str, expires_at: int) -> bool:
+        with self._lock:
+            revoked = jti in self._buckets.get(expires_at // BUCKET_SECONDS, ())
+            if revoked:
+                self.rejected += 1
+            return revoked
+
+    def _add(self, jti: str, expires_at: int) -> None:
+        """Adds a revoked jti, called with the lock held."""
+        self._buckets.setdefault(expires_at // BUCKET_SECONDS, set()).add(jti)
+
+    def sync_due(self) -> bool:
+        return (
+            self._synced_at is None
+            or monotonic() - self._synced_at >= self.sync_interval
+        )
+
+    def revoke(self, session: Session, jti: str, expires_at: int) -> bool:
+        """Revokes a jti, returning False when it was revoked already.
+
+        The primary key catches a token revoked by another process that this
+        one has not synced yet, or by a concurrent request. The jti is only
+        held in memory once its row is committed, a failed commit leaves the
+        token usable.
+        """
+        with self._lock:
+            if jti in self._buckets.get(expires_at // BUCKET_SECONDS, ()):
+                return False
+        session.add(RevokedToken(jti=jti, expires_at=expires_at, revoked_at=time()))
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            with self._lock:
+                self._add(jti, expires_at)
+            return False
+        except Exception:
+            session.rollback()
+            raise
+        with self._lock:
+            self._add(jti, expires_at)
+            self.revoked += 1
+        return True
+
+    def sync(self, session: Session) -> None:
+        """Loads the tokens revoked by other processes, compacting when due."""
+        now = time()
+        rows = session.exec(
+            select(
+                RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at
+            ).where(
+                RevokedToken.revoked_at >= self._synced_until,
+                RevokedToken.expires_at >= now,
+            )
+        ).all()
+        with self._lock:
+            for jti, expires_at, revoked_at in rows:
+                self._add(jti, expires_at)
+                self._synced_until = max(self._synced_until, revoked_at)
+            self._synced_at = monotonic()
+        if monotonic() - self._compacted_at >= self.compact_interval:
+            self.compact(session, now)
+
+    def compact(self, session: Session, now: float | None = None) -> None:
+        """Forgets the tokens that have expired, they fail to decode anyway."""
+        now = time() if now is None else now
+        with self._lock:
+            for hour in [
+                hour for hour in self._buckets if hour < now // BUCKET_SECONDS
+            ]:
+                del self._buckets[hour]
+            self._compacted_at = monotonic()
+        result = session.execute(
+            delete(RevokedToken).where(RevokedToken.expires_at < now)
+        )
+        session.commit()
+        with self._lock:
+            self.compacted += result.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self._synced_until = 0.0
+            self._synced_at = None
+
+    def as_dict(self) -> dict[str, int | float | bool]:
+        """Returns the size and counters of the store for monitoring."""
+        with self._lock:
+            return {
+                'rotation': REFRESH_TOKEN_ROTATION,
+                'tokens': sum(len(bucket) for bucket in self._buckets.values()),
+                'buckets': len(self._buckets),
+                'revoked': self.revoked,
+                'rejected': self.rejected,
+                'compacted': self.compacted,
+                'sync_interval': self.sync_interval,
+            }
+
+
+revocation_store = RevocationStore(
+    sync_interval=REVOCATION_SYNC_INTERVAL, compact_interval=REVOCATION_COMPACT_INTERVAL
+)
@@ -1,33 +1,44 @@
-import jwt
 from datetime import timedelta
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.encoders import jsonable_encoder
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
 
-from auth.models import Token
+from auth.limits import admit_password_check, limit_auth_attempts
+from auth.models import Principal, Token
 from auth.utils import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
-    ALGORITHM,
     REFRESH_TOKEN_EXPIRE_MINUTES,
-    SECRET_KEY_REFRESH,
     authenticate_user,
     create_access_token,
     create_refresh_token,
+    decode_refresh_token,
 )
-from dependencies import check_refresh_cookie
+from auth.revocation import REFRESH_TOKEN_ROTATION, revocation_store
+from dependencies import check_refresh_cookie, get_session
 from user.models import User
 
 
-auth_router = APIRouter(prefix='/api/v1/oauth2', tags=['authentication'])
+# Rate limited before any other dependency opens a session
+auth_router = APIRouter(
+    prefix='/api/v1/oauth2',
+    tags=['authentication'],
+    dependencies=[Depends(limit_auth_attempts)],
+)
 
 
-@auth_router.post('/token/')
-async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
+@auth_router.post(
+    '/token/', response_model=Token, dependencies=[Depends(admit_password_check)]
+)
+async def login(
+    session: Annotated[Session, Depends(get_session)],
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+    response: Response,
+):
     """Logs in a user with username and password."""
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await authenticate_user(session, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -40,18 +51,31 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
         data={'sub': user.username}, expires_delta=refresh_token_expires
     )
     access_token = create_access_token(
-        data={'sub': user.username}, expires_delta=access_token_expires
-    )
-    response = JSONResponse(
-        jsonable_encoder(Token(access_token=access_token, token_type='bearer')),
-        status_code=200,
+        data={'sub': user.username},
+        expires_delta=access_token_expires,
+        principal=Principal.from_user(user),
     )
     response.set_cookie(key='refreshToken', value=refresh_token)
-    return response
+    return Token(access_token=access_token, token_type='bearer')
+
+
+async def check_not_revoked(session: Session, payload: dict) -> str | None:
+    """Returns the jti of a refresh token, 401 when it has been revoked.
+
+    Tokens issued before jtis were added have none and cannot be revoked.
+    """
+    jti: str | None = payload.get('jti')
+    if revocation_store.sync_due():
+        await run_in_threadpool(revocation_store.sync, session)
+    if jti and revocation_store.is_revoked(jti, payload['exp']):
+        raise HTTPException(status_code=401, detail='Refresh token revoked')
+    return jti
 
 
-@auth_router.post('/refresh/')
+@auth_router.post('/refresh/', response_model=Token)
 async def refresh(
+    session: Annotated[Session, Depends(get_session)],
+    response: Response,
     refreshToken: str = Depends(check_refresh_cookie),
 ):
     """
@@ -59,19 +83,44 @@ async def refresh(
     """
     if not refreshToken:
         raise HTTPException(status_code=401, detail='No refresh token')
-    payload = jwt.decode(refreshToken, SECRET_KEY_REFRESH, algorithms=[ALGORITHM])
-    if not payload:
-        raise HTTPException(status_code=401, detail='Invalid refresh token')
+    payload = decode_refresh_token(refreshToken)
+    jti = await check_not_revoked(session, payload)
     username: str | None = payload.get('sub')
-    user = User.get_user(username)
+    # Off the event loop, a pool checkout may block while connections are busy
+    user = await run_in_threadpool(User.get_user, session, username)
     if not user:
         raise HTTPException(status_code=401, detail='User does not exist')
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={'sub': user.username}, expires_delta=access_token_expires
-    )
-    return JSONResponse(
-        jsonable_encoder(Token(access_token=access_token, token_type='bearer')),
-        status_code=200,
+        data={'sub': user.username},
+        expires_delta=access_token_expires,
+        principal=Principal.from_user(user),
     )
+    if REFRESH_TOKEN_ROTATION:
+        refresh_token = create_refresh_token(
+            data={'sub': user.username},
+            expires_delta=timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES),
+        )
+        # A token used twice means a concurrent refresh or a stolen copy
+        if jti and not await run_in_threadpool(
+            revocation_store.revoke, session, jti, payload['exp']
+        ):
+            raise HTTPException(status_code=401, detail='Refresh token revoked')
+        response.set_cookie(key='refreshToken', value=refresh_token)
+    return Token(access_token=access_token, token_type='bearer')
+
+
+@auth_router.post('/revoke/')
+async def revoke(
+    session: Annotated[Session, Depends(get_session)],
+    response: Response,
+    refreshToken: str = Depends(check_refresh_cookie),
+):
+    """Revokes the refresh token of the cookie and removes the cookie."""
+    payload = decode_refresh_token(refreshToken)
+    jti: str | None = payload.get('jti')
+    if jti:
+        await run_in_threadpool(revocation_store.revoke, session, jti, payload['exp'])
+    response.delete_cookie(key='refreshToken')
+    return {'revoked': True}
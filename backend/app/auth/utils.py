@@ -1,10 +1,16 @@
 import jwt
+import uuid
 
-from decouple import config
+from decouple import Choices, config
 from datetime import datetime, timezone, timedelta
-from passlib.context import CryptContext
+from fastapi import HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
 
+from auth.hashing import check_password, hash_password, password_hasher
+
+from auth.models import Principal
 from user.models import User
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
@@ -12,23 +18,39 @@ REFRESH_TOKEN_EXPIRE_MINUTES = 10080
 ALGORITHM = config('ALGORITHM')
 SECRET_KEY_ACCESS = config('SECRET_KEY_ACCESS')
 SECRET_KEY_REFRESH = config('SECRET_KEY_REFRESH')
-
-
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+# Embeds user id, group id and role name in access tokens
+TOKEN_ROLE_CLAIMS = config('TOKEN_ROLE_CLAIMS', default=True, cast=bool)
+# 'strict' re-validates every principal against the DB (or principal cache),
+# 'claims' trusts the role claims of the token for permission checks, so
+# role changes and disabled users take effect when the token expires.
+AUTH_MODE = config('AUTH_MODE', default='strict', cast=Choices(['strict', 'claims']))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='/api/v1/oauth2/token/')
 
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return check_password(plain_password, hashed_password)
 
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return hash_password(password)
 
 
-def create_access_token(data: dict, expires_delta: timedelta | None = None):
+def create_access_token(
+    data: dict,
+    expires_delta: timedelta | None = None,
+    principal: Principal | None = None,
+):
     to_encode = data.copy()
+    # Disabled users never get claims so they always go through the DB check
+    if TOKEN_ROLE_CLAIMS and principal and not principal.disabled:
+        to_encode.update(
+            {
+                'uid': principal.id,
+                'gid': principal.group_id,
+                'role': principal.group_name,
+            }
+        )
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
@@ -44,15 +66,28 @@ def create_refresh_token(data: dict, expires_delta: timedelta | None = None):
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=10080)
-    to_encode.update({'exp': expire})
+    # The jti is what the revocation store records
+    to_encode.update({'exp': expire, 'jti': uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY_REFRESH, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-def authenticate_user(username: str, password: str):
-    user: User | None = User.get_user(username=username)
+def decode_refresh_token(token: str) -> dict:
+    """Returns the claims of a refresh token, 401 when invalid or expired."""
+    try:
+        return jwt.decode(token, SECRET_KEY_REFRESH, algorithms=[ALGORITHM])
+    except jwt.InvalidTokenError as error:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid refresh token'
+        ) from error
+
+
+async def authenticate_user(session: Session, username: str, password: str):
+    user: User | None = await run_in_threadpool(
+        User.get_user, session, username=username
+    )
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return False
     return user
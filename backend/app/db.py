@@ -1,20 +1,305 @@
+import re
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+from typing import Any
+
 from decouple import config
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import SQLModel, create_engine
 
+from utils.search import create_search_indexes, drop_search_indexes
+
 # from item.models import Item
 # from group.models import Group
 
 # Database setup
 sqlite_file_name = config('SQL_FILE_NAME')
 sqlite_url = f'sqlite:///{sqlite_file_name}'
+sqlite_async_url = f'sqlite+aiosqlite:///{sqlite_file_name}'
+# Read-only connections, SQLite refuses writes on them at the file level
+sqlite_read_url = f'sqlite:///file:{sqlite_file_name}?mode=ro&uri=true'
+sqlite_async_read_url = f'sqlite+aiosqlite:///file:{sqlite_file_name}?mode=ro&uri=true'
 connect_args = {'check_same_thread': False}
-engine = create_engine(sqlite_url, echo=False, connect_args=connect_args)
-# engine = create_engine(sqlite_url, echo=True, connect_args=connect_args)
+
+# Connection pool setup
+POOL_SIZE = config('DB_POOL_SIZE', default=5, cast=int)
+POOL_MAX_OVERFLOW = config('DB_POOL_MAX_OVERFLOW', default=10, cast=int)
+POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=30, cast=int)
+POOL_PRE_PING = config('DB_POOL_PRE_PING', default=False, cast=bool)
+POOL_RECYCLE = config('DB_POOL_RECYCLE', default=-1, cast=int)
+pool_args = {
+    'pool_size': POOL_SIZE,
+    'max_overflow': POOL_MAX_OVERFLOW,
+    'pool_timeout': POOL_TIMEOUT,
+    'pool_pre_ping': POOL_PRE_PING,
+    'pool_recycle': POOL_RECYCLE,
+}
+
+
+# SQLite storage profile, applied on every new connection
+SQLITE_PROFILE = config('SQLITE_PROFILE', default='tuned')
+STORAGE_PROFILES: dict[str, dict[str, str | int]] = {
+    # SQLite built-in behaviour: rollback journal and full fsync
+    'default': {},
+    'tuned': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,
+        'cache_size': -64000,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+}
+STORAGE_PRAGMAS = (
+    'journal_mode',
+    'synchronous',
+    'mmap_size',
+    'cache_size',
+    'temp_store',
+    'busy_timeout',
+)
+
+
+def get_storage_profile(name: str) -> dict[str, str | int]:
+    """Returns the pragmas of a profile, overridden by SQLITE_<PRAGMA> settings."""
+    if name not in STORAGE_PROFILES:
+        raise ValueError(f'Unknown SQLite storage profile: {name}')
+    profile = dict(STORAGE_PROFILES[name])
+    for pragma in STORAGE_PRAGMAS:
+        value = config(f'SQLITE_{pragma.upper()}', default=None)
+        if value is not None:
+            profile[pragma] = value
+    return profile
+
+
+def get_read_profile(profile: dict[str, str | int]) -> dict[str, str | int]:
+    """Returns the pragmas of read-only connections.
+
+    The journal mode is left to the writer, a read-only connection cannot
+    change it, and query_only also refuses writes to temporary tables.
+    """
+    read_profile = {
+        pragma: value for pragma, value in profile.items() if pragma != 'journal_mode'
+    }
+    read_profile['query_only'] = 1
+    return read_profile
+
+
+def apply_storage_profile(engine: Engine, profile: dict[str, str | int]) -> None:
+    """Runs the profile pragmas on every new connection of the engine."""
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in profile.items():
+            cursor.execute(f'PRAGMA {pragma}={value}')
+        cursor.close()
+
+
+class PoolStatistics:
+    """Counts pool events of an engine for monitoring."""
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self._lock = Lock()
+        event.listen(engine, 'connect', self.on_connect)
+        event.listen(engine, 'checkout', self.on_checkout)
+        event.listen(engine, 'checkin', self.on_checkin)
+        event.listen(engine, 'invalidate', self.on_invalidate)
+
+    def on_connect(self, *args) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, *args) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def on_checkin(self, *args) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def on_invalidate(self, *args) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def as_dict(self) -> dict[str, int | str]:
+        """Returns event counters together with the current pool state."""
+        pool = self.engine.pool
+        return {
+            'pool': type(pool).__name__,
+            'size': getattr(pool, 'size', lambda: 0)(),
+            'checked_out': getattr(pool, 'checkedout', lambda: 0)(),
+            'checked_in': getattr(pool, 'checkedin', lambda: 0)(),
+            'overflow': getattr(pool, 'overflow', lambda: 0)(),
+            'connects': self.connects,
+            'checkouts': self.checkouts,
+            'checkins': self.checkins,
+            'invalidations': self.invalidations,
+        }
+
+
+# IN lists of any length share one statement shape
+IN_LIST = re.compile(r'\(\?(?:, \?)*\)')
+
+
+class RequestQueries:
+    """Statements run and time spent in the database while handling a request."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: dict[str, int] = {}
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        shape = IN_LIST.sub('(?)', statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """Returns the statement shapes run at least threshold times."""
+        return {
+            shape: count for shape, count in self.shapes.items() if count >= threshold
+        }
+
+
+# Set per request by monitoring.queries.QueryTrackingMiddleware
+request_queries: ContextVar[RequestQueries | None] = ContextVar(
+    'request_queries', default=None
+)
+
+
+def track_request_queries(engine: Engine) -> None:
+    """Adds every statement of the engine to the RequestQueries of its request."""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and request_queries.get() is not None:
+            context.request_query_started = perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        queries = request_queries.get()
+        started = getattr(context, 'request_query_started', None)
+        if queries is not None and started is not None:
+            queries.record(statement, perf_counter() - started)
+
+
+# Async database setup, used by the routers when ASYNC_DATABASE is enabled
+ASYNC_DATABASE = config('ASYNC_DATABASE', default=False, cast=bool)
+# GET requests read through engines of read-only connections, so long lists
+# and exports do not take the connections writes need
+READ_ENGINE_ENABLED = config('DB_READ_ENGINE', default=True, cast=bool)
+
+# The engines are created on first use rather than on import, so importing
+# the app stays cheap and a process forked before any request opens its own
+# connections. `from db import engine` still works through __getattr__.
+_engines: dict[str, Engine | AsyncEngine] = {}
+_pool_statistics: dict[str, PoolStatistics] = {}
+_engines_lock = Lock()
+
+
+def setup_engine(name: str, engine: Engine, read_only: bool = False) -> None:
+    """Applies the storage profile, query tracking and pool statistics."""
+    profile = get_storage_profile(SQLITE_PROFILE)
+    apply_storage_profile(engine, get_read_profile(profile) if read_only else profile)
+    track_request_queries(engine)
+    _pool_statistics[name] = PoolStatistics(engine)
+
+
+def get_or_create_engine(name: str, url: str, read_only: bool = False) -> Any:
+    """Returns the named engine, creating it on the first call."""
+    engine = _engines.get(name)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(name)
+            if engine is None:
+                if url.startswith('sqlite+aiosqlite'):
+                    engine = create_async_engine(
+                        url, echo=False, connect_args=connect_args, **pool_args
+                    )
+                    setup_engine(name, engine.sync_engine, read_only)
+                else:
+                    engine = create_engine(
+                        url, echo=False, connect_args=connect_args, **pool_args
+                    )
+                    setup_engine(name, engine, read_only)
+                _engines[name] = engine
+    return engine
+
+
+def get_engine() -> Engine:
+    return get_or_create_engine('sync', sqlite_url)
+
+
+def get_async_engine() -> AsyncEngine:
+    return get_or_create_engine('async', sqlite_async_url)
+
+
+def get_read_engine() -> Engine:
+    """Engine of read-only connections, the writer one with DB_READ_ENGINE off."""
+    if not READ_ENGINE_ENABLED:
+        return get_engine()
+    return get_or_create_engine('sync_read', sqlite_read_url, read_only=True)
+
+
+def get_async_read_engine() -> AsyncEngine:
+    if not READ_ENGINE_ENABLED:
+        return get_async_engine()
+    return get_or_create_engine('async_read', sqlite_async_read_url, read_only=True)
+
+
+def __getattr__(name: str) -> Engine | AsyncEngine:
+    if name == 'engine':
+        return get_engine()
+    if name == 'async_engine':
+        return get_async_engine()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+async def dispose_engines() -> None:
+    """Closes the pooled connections of the engines created so far."""
+    for engine in list(_engines.values()):
+        if isinstance(engine, AsyncEngine):
+            await engine.dispose()
+        else:
+            engine.dispose()
+
+
+def reset_engines_after_fork() -> None:
+    """Forgets the pooled connections a forked process inherited.
+
+    close=False leaves them open for the parent, which still owns them.
+    """
+    for engine in _engines.values():
+        if isinstance(engine, AsyncEngine):
+            engine.sync_engine.dispose(close=False)
+        else:
+            engine.dispose(close=False)
+
+
+def get_pool_statistics() -> dict[str, dict[str, int | str]]:
+    """Returns pool statistics of the engines created so far.
+
+    Reading them creates no engine, an engine the mode does not use is left out.
+    """
+    with _engines_lock:
+        pool_statistics = list(_pool_statistics.items())
+    return {name: statistics.as_dict() for name, statistics in pool_statistics}
 
 
 def drop_tables():
-    SQLModel.metadata.drop_all(engine)
+    drop_search_indexes(get_engine())
+    SQLModel.metadata.drop_all(get_engine())
 
 
 def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+    SQLModel.metadata.create_all(get_engine())
+    create_search_indexes(get_engine())
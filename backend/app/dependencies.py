@@ -1,25 +1,100 @@
-from typing import Annotated
+import base64
+import json
+from typing import Annotated, Any, Sequence
 
-from fastapi import Cookie, Query
+from fastapi import Cookie, HTTPException, Query, Request, Response
+from sqlalchemy import tuple_
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from db import engine
+from db import get_async_engine, get_async_read_engine, get_engine, get_read_engine
 
+READ_METHODS = frozenset({'GET', 'HEAD'})
+# `X-Consistency: strong` reads through the writer engine, for a client that
+# wants to be sure to see the write it just made
+CONSISTENCY_HEADER = 'X-Consistency'
 
-def get_session():
+
+def reads_only(request: Request) -> bool:
+    """Whether the request can use the read-only engine."""
+    return (
+        request.method in READ_METHODS
+        and request.headers.get(CONSISTENCY_HEADER, '').lower() != 'strong'
+    )
+
+
+# The session is cached per request, so the auth dependencies and the route
+# share it and a write request reads its principal from the writer engine
+def get_session(request: Request):
+    engine = get_read_engine() if reads_only(request) else get_engine()
     with Session(engine) as session:
-        return session
+        yield session
+
+
+async def get_async_session(request: Request):
+    engine = get_async_read_engine() if reads_only(request) else get_async_engine()
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
 
 
 def check_refresh_cookie(refreshToken: Annotated[str, Cookie()]):
     return refreshToken
 
 
+def encode_cursor(sort_value: Any, object_id: int) -> str:
+    """Encodes the (sort key, id) of a row into an opaque cursor."""
+    raw = json.dumps([sort_value, object_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[Any, int]:
+    """Decodes a cursor created by encode_cursor."""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        sort_value, object_id = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        return sort_value, int(object_id)
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Invalid cursor.') from error
+
+
 class ListPaginationDependency:
+    """Offset pagination, or keyset pagination when a cursor is given.
+
+    Offset pages keep the id order. Keyset pages are ordered by (sort key,
+    id) and continue after the row encoded in the cursor, so every page
+    costs the same as the first one. An empty cursor starts from the first
+    row, and the cursor of the next page is returned in the X-Next-Cursor
+    header.
+    """
+
     def __init__(
         self,
         limit: Annotated[int, Query(ge=10, le=100)] = 10,
         offset: Annotated[int, Query()] = 0,
+        cursor: Annotated[(str | None), Query(max_length=500)] = None,
     ) -> None:
         self.limit = limit
         self.offset = offset
+        self.cursor = cursor
+
+    def paginate(self, statement: Any, sort_column: Any, id_column: Any) -> Any:
+        """Orders the statement and applies the cursor or the offset."""
+        if self.cursor is None:
+            return statement.order_by(id_column).offset(self.offset).limit(self.limit)
+        statement = statement.order_by(sort_column, id_column)
+        if self.cursor:
+            sort_value, object_id = decode_cursor(self.cursor)
+            statement = statement.where(
+                tuple_(sort_column, id_column) > tuple_(sort_value, object_id)
+            )
+        return statement.limit(self.limit)
+
+    def set_next_cursor(
+        self, response: Response, rows: Sequence[Any], sort_attribute: str
+    ) -> None:
+        """Adds the cursor of the next keyset page when the page is full."""
+        if self.cursor is not None and len(rows) == self.limit:
+            last_row = rows[-1]
+            response.headers['X-Next-Cursor'] = encode_cursor(
+                getattr(last_row, sort_attribute), last_row.id
+            )
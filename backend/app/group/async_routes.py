@@ -0,0 +1,100 @@
+"""Async routes for groups."""
+
+from typing import Annotated, Sequence
+from fastapi import APIRouter, Query, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from auth.dependencies import AsyncHasPermissions
+from dependencies import ListPaginationDependency, get_async_session
+from group import crud
+from group.models import GroupPermission, GroupCreate, GroupUpdate
+from group.relationships import GroupWithRelationships
+from utils.export import ExportFormat
+
+async_group_router = APIRouter(
+    prefix='/api/v1/groups',
+    tags=['groups'],
+    responses={404: {'detail': 'Not found'}},
+)
+
+# Groups have no owner, so only administrators pass the owner check
+user_is_admin = AsyncHasPermissions(
+    object_model=GroupPermission, valid_roles=['Administrator'], check_owner=True
+)
+
+
+@async_group_router.get('/', response_model=Sequence[GroupWithRelationships])
+async def get_groups(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    pagination: Annotated[ListPaginationDependency, Depends()],
+    response: Response,
+    name: Annotated[(str | None), Query(max_length=50)] = None,
+):
+    """Get groups."""
+    return await session.run_sync(crud.get_groups, pagination, response, name)
+
+
+@async_group_router.get(
+    '/search/',
+    response_model=Sequence[GroupWithRelationships],
+)
+async def search_groups(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    pagination: Annotated[ListPaginationDependency, Depends()],
+    q: Annotated[str, Query(min_length=3, max_length=50)],
+):
+    """Search groups by name, best match first."""
+    return await session.run_sync(crud.search_groups, pagination, q)
+
+
+@async_group_router.post('/', response_model=GroupWithRelationships)
+async def create_group(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    new_item: GroupCreate,
+):
+    """Create a group."""
+    return await session.run_sync(crud.create_group, new_item)
+
+
+@async_group_router.get(
+    '/export/',
+    dependencies=[Depends(user_is_admin)],
+    response_class=StreamingResponse,
+)
+async def export_groups(
+    export_format: Annotated[ExportFormat, Query(alias='format')] = 'ndjson',
+    updated_since: Annotated[(float | None), Query(ge=0)] = None,
+):
+    """Stream groups as NDJSON or CSV, all or those updated since updated_since."""
+    return crud.export_groups(export_format, updated_since)
+
+
+@async_group_router.get('/{object_id}/', response_model=GroupWithRelationships)
+async def get_item(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    request: Request,
+    response: Response,
+    object_id: int,
+):
+    """Get a single group, or 304 when If-None-Match holds its current ETag."""
+    return await session.run_sync(crud.get_group, request, response, object_id)
+
+
+@async_group_router.put('/{object_id}/', response_model=GroupWithRelationships)
+async def update_group(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    object_id: int,
+    new_group: GroupUpdate,
+):
+    """Update a single group."""
+    return await session.run_sync(crud.update_group, object_id, new_group)
+
+
+@async_group_router.delete('/{object_id}/')
+async def delete_group(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    object_id: int,
+):
+    """Deletes a single group."""
+    return await session.run_sync(crud.delete_group, object_id)
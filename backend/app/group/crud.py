@@ -0,0 +1,163 @@
+"""Group route bodies shared by the sync and async group routers.
+
+Each function runs on a sync Session, the async router calls them through
+AsyncSession.run_sync.
+"""
+
+from typing import Any
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
+
+from dependencies import ListPaginationDependency
+from group.models import GroupPermission, GroupCreate, GroupSummary, GroupUpdate
+from group.relationships import (
+    group_adapter,
+    groups_adapter,
+    group_relationship_options,
+    group_versions,
+    group_versions_statement,
+)
+from user.cache import principal_cache
+from utils.etag import (
+    bump_versions,
+    current_etag,
+    etag_matches,
+    make_etag,
+    not_modified,
+)
+from utils.export import ExportFormat, export_response, export_statement
+from utils.models import create_unique_slugs
+from utils.search import ranked_search, where_contains
+from utils.serialization import model_response
+
+
+def get_groups(
+    session: Session,
+    pagination: ListPaginationDependency,
+    response: Response,
+    name: str | None,
+) -> Response:
+    try:
+        statement = select(GroupPermission).options(*group_relationship_options)
+        statement = where_contains(statement, GroupPermission, 'name', name)
+        statement = pagination.paginate(
+            statement, GroupPermission.name, GroupPermission.id
+        )
+        groups = session.exec(statement).all()
+        pagination.set_next_cursor(response, groups, 'name')
+        return model_response(groups_adapter, groups, response)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(
+            status_code=400, detail='Error fetching item list.'
+        ) from error
+
+
+def search_groups(
+    session: Session, pagination: ListPaginationDependency, q: str
+) -> Response:
+    try:
+        statement = (
+            ranked_search(GroupPermission, q)
+            .options(*group_relationship_options)
+            .offset(pagination.offset)
+            .limit(pagination.limit)
+        )
+        groups = session.exec(statement).all()
+        return model_response(groups_adapter, groups)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(
+            status_code=400, detail='Error searching groups.'
+        ) from error
+
+
+def create_group(session: Session, new_group: GroupCreate) -> Response:
+    try:
+        slug = create_unique_slugs(session, GroupPermission, [new_group])[0]
+        db_group = GroupPermission.model_validate(new_group, update={'slug': slug})
+        session.add(db_group)
+        session.commit()
+        session.refresh(db_group)
+        return model_response(group_adapter, db_group)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error creating group.') from error
+
+
+def export_groups(
+    export_format: ExportFormat, updated_since: float | None
+) -> StreamingResponse:
+    try:
+        statement = export_statement(GroupPermission, [], updated_since)
+        return export_response(statement, GroupSummary, export_format, 'groups')
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(
+            status_code=400, detail='Error exporting groups.'
+        ) from error
+
+
+def get_group(
+    session: Session, request: Request, response: Response, object_id: int
+) -> Response:
+    try:
+        # Without If-None-Match the ETag comes from the loaded object
+        if 'if-none-match' in request.headers:
+            etag = current_etag(session, group_versions_statement(object_id))
+            if etag and etag_matches(request, etag):
+                return not_modified(etag)
+        group: GroupPermission | None = session.get(
+            GroupPermission, object_id, options=group_relationship_options
+        )
+        if group:
+            response.headers['ETag'] = make_etag(group_versions(group))
+            return model_response(group_adapter, group, response)
+        raise HTTPException(status_code=404, detail='Group not found.')
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error fetching group.') from error
+
+
+def update_group(session: Session, object_id: int, new_group: GroupUpdate) -> Response:
+    try:
+        # Get group
+        group: GroupPermission | None = session.get(GroupPermission, object_id)
+        if group:
+            # Update group
+            new_group_data: dict[str, Any] = new_group.model_dump(exclude_unset=True)
+            group.sqlmodel_update(new_group_data)
+            # Saves group, bumping its version
+            session.add(group)
+            bump_versions(session, GroupPermission, [object_id])
+            session.commit()
+            principal_cache.invalidate_group(object_id)
+            session.refresh(group)
+            return model_response(group_adapter, group)
+        raise HTTPException(status_code=404, detail='Group not found.')
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error updating group.') from error
+
+
+def delete_group(session: Session, object_id: int) -> dict[str, bool]:
+    try:
+        group = session.get(GroupPermission, object_id)
+        if group:
+            session.delete(group)
+            session.commit()
+            principal_cache.invalidate_group(object_id)
+            return {'deleted': True}
+        raise HTTPException(status_code=404, detail='Group not found')
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error deleting group.') from error
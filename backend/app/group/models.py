@@ -2,14 +2,14 @@ from typing import TYPE_CHECKING
 from sqlmodel import Relationship, SQLModel, Field
 
 from user.models import User
-from utils.models import SluggifiedModel
+from utils.models import SluggifiedModel, VersionedModel
 
 if TYPE_CHECKING:
     from user.models import User
 
 
 class BaseGroup(SQLModel):
-    name: str = Field(max_length=100)
+    name: str = Field(max_length=100, index=True)
 
 
 class GroupUpdate(SQLModel):
@@ -20,6 +20,12 @@ class GroupCreate(BaseGroup):
     pass
 
 
-class GroupPermission(SluggifiedModel, BaseGroup, table=True):
+class GroupSummary(SluggifiedModel, BaseGroup):
+    """Group without its users or row version."""
+
+    id: int
+
+
+class GroupPermission(SluggifiedModel, VersionedModel, BaseGroup, table=True):
     id: int | None = Field(default=None, primary_key=True)
     users: list['User'] = Relationship(back_populates='group')
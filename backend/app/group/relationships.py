@@ -1,4 +1,8 @@
-from group.models import BaseGroup
+from pydantic import TypeAdapter
+from sqlalchemy import Select, select
+from sqlalchemy.orm import selectinload
+
+from group.models import BaseGroup, GroupPermission
 from user.models import UserSafe
 from utils.models import SluggifiedModel
 
@@ -6,3 +10,22 @@ from utils.models import SluggifiedModel
 class GroupWithRelationships(SluggifiedModel, BaseGroup):
     id: int | None = None
     users: list[UserSafe] = []
+
+
+group_adapter = TypeAdapter(GroupWithRelationships)
+groups_adapter = TypeAdapter(list[GroupWithRelationships])
+
+# Loads what GroupWithRelationships serializes, one extra query for users
+group_relationship_options = [selectinload(GroupPermission.users)]  # type: ignore
+
+
+def group_versions_statement(object_id: int) -> Select:
+    """Selects the version GroupWithRelationships depends on.
+
+    User writes bump their group's version, so users need no column here.
+    """
+    return select(GroupPermission.version).where(GroupPermission.id == object_id)
+
+
+def group_versions(group: GroupPermission) -> tuple[int | None, ...]:
+    return (group.version,)
@@ -1,12 +1,16 @@
 """Routes for items."""
 
-from typing import Annotated, Any, Sequence
-from fastapi import APIRouter, HTTPException, Path, Query, Depends
-from sqlmodel import Session, col, select
+from typing import Annotated, Sequence
+from fastapi import APIRouter, Query, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
 
+from auth.dependencies import HasPermissions
 from dependencies import ListPaginationDependency, get_session
+from group import crud
 from group.models import GroupPermission, GroupCreate, GroupUpdate
 from group.relationships import GroupWithRelationships
+from utils.export import ExportFormat
 
 group_router = APIRouter(
     prefix='/api/v1/groups',
@@ -14,29 +18,34 @@ group_router = APIRouter(
     responses={404: {'detail': 'Not found'}},
 )
 
+# Groups have no owner, so only administrators pass the owner check
+user_is_admin = HasPermissions(
+    object_model=GroupPermission, valid_roles=['Administrator'], check_owner=True
+)
+
 
 @group_router.get('/', response_model=Sequence[GroupWithRelationships])
 def get_groups(
     session: Annotated[Session, Depends(get_session)],
     pagination: Annotated[ListPaginationDependency, Depends()],
+    response: Response,
     name: Annotated[(str | None), Query(max_length=50)] = None,
 ):
     """Get groups."""
-    try:
-        statement = (
-            select(GroupPermission)
-            .where(col(GroupPermission.name).contains(name if name else ''))
-            .offset(pagination.offset)
-            .limit(pagination.limit)
-        )
-        groups = session.exec(statement).all()
-        return groups
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(
-            status_code=400, detail='Error fetching item list.'
-        ) from error
+    return crud.get_groups(session, pagination, response, name)
+
+
+@group_router.get(
+    '/search/',
+    response_model=Sequence[GroupWithRelationships],
+)
+def search_groups(
+    session: Annotated[Session, Depends(get_session)],
+    pagination: Annotated[ListPaginationDependency, Depends()],
+    q: Annotated[str, Query(min_length=3, max_length=50)],
+):
+    """Search groups by name, best match first."""
+    return crud.search_groups(session, pagination, q)
 
 
 @group_router.post('/', response_model=GroupWithRelationships)
@@ -46,30 +55,31 @@ def create_group(
     new_item: GroupCreate,
 ):
     """Create a group."""
-    try:
-        db_group = GroupPermission.model_validate(new_item)
-        session.add(db_group)
-        session.commit()
-        session.refresh(db_group)
-        return db_group
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(status_code=400, detail='Error creating group.') from error
+    return crud.create_group(session, new_item)
+
+
+@group_router.get(
+    '/export/',
+    dependencies=[Depends(user_is_admin)],
+    response_class=StreamingResponse,
+)
+def export_groups(
+    export_format: Annotated[ExportFormat, Query(alias='format')] = 'ndjson',
+    updated_since: Annotated[(float | None), Query(ge=0)] = None,
+):
+    """Stream groups as NDJSON or CSV, all or those updated since updated_since."""
+    return crud.export_groups(export_format, updated_since)
 
 
 @group_router.get('/{object_id}/', response_model=GroupWithRelationships)
-def get_item(session: Annotated[Session, Depends(get_session)], object_id: int):
-    """Get a single group."""
-    try:
-        group: GroupPermission | None = session.get(GroupPermission, object_id)
-        if group:
-            return group
-        raise HTTPException(status_code=404, detail='Group not found.')
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(status_code=400, detail='Error fetching group.') from error
+def get_item(
+    session: Annotated[Session, Depends(get_session)],
+    request: Request,
+    response: Response,
+    object_id: int,
+):
+    """Get a single group, or 304 when If-None-Match holds its current ETag."""
+    return crud.get_group(session, request, response, object_id)
 
 
 @group_router.put('/{object_id}/', response_model=GroupWithRelationships)
@@ -80,23 +90,7 @@ def update_group(
     new_group: GroupUpdate,
 ):
     """Update a single group."""
-    try:
-        # Get group
-        group: GroupPermission | None = session.get(GroupPermission, object_id)
-        if group:
-            # Update group
-            new_group_data: dict[str, Any] = new_group.model_dump(exclude_unset=True)
-            group.sqlmodel_update(new_group_data)
-            # Saves group
-            session.add(group)
-            session.commit()
-            session.refresh(group)
-            return group
-        raise HTTPException(status_code=404, detail='Group not found.')
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(status_code=400, detail='Error updating group.') from error
+    return crud.update_group(session, object_id, new_group)
 
 
 @group_router.delete('/{object_id}/')
@@ -106,14 +100,4 @@ def delete_group(
     object_id: int,
 ):
     """Deletes a single group."""
-    try:
-        group = session.get(GroupPermission, object_id)
-        if group:
-            session.delete(group)
-            session.commit()
-            return {'deleted': True}
-        raise HTTPException(status_code=404, detail='Group not found')
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(status_code=400, detail='Error deleting group.') from error
+    return crud.delete_group(session, object_id)
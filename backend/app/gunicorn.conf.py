@@ -0,0 +1,67 @@
+"""Gunicorn settings for serving the app with uvicorn workers.
+
+gunicorn and uvicorn-worker are default packages in the Pipfile, so
+`pipenv install --dev` sets up a development environment that can run it.
+Run from the backend directory:
+
+    gunicorn --config app/gunicorn.conf.py 'main:create_app()'
+
+`python benchmarks/workers.py --workers 1,2` starts it with one and two
+workers and fails unless every request is answered with a 200.
+
+Every option is read from the environment. With WEB_PRELOAD the app is
+imported once in the master and forked, which saves memory and start time;
+the engines are created on first use, and post_fork drops whatever a worker
+inherited anyway, so every worker opens its own SQLite connections. WAL
+mode lets the workers read concurrently while one of them writes.
+
+Per process state is not shared between workers, so WEB_WORKERS defaults
+to 1. With more workers:
+
+- /metrics answers from whichever worker takes the scrape, with only the
+  requests that worker served.
+- A worker keeps serving the cached role and group of a user changed through
+  another worker for up to PRINCIPAL_CACHE_TTL seconds.
+- A refresh token revoked through one worker is still accepted by the others
+  for up to REVOCATION_SYNC_INTERVAL seconds.
+- The login rate limits allow up to WEB_WORKERS times their burst, and every
+  worker runs its own HASH_WORKERS hashing threads.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Aliased, gunicorn reads every module level name as a setting and
+# `config` is one of them
+from decouple import config as env
+
+chdir = str(Path(__file__).resolve().parent)
+bind = env('WEB_BIND', default='0.0.0.0:80')
+worker_class = 'uvicorn_worker.UvicornWorker'
+workers = env('WEB_WORKERS', default=1, cast=int)
+preload_app = env('WEB_PRELOAD', default=True, cast=bool)
+
+# Workers restart after max_requests, plus a random jitter so they do not
+# all restart at once
+max_requests = env('WEB_MAX_REQUESTS', default=10000, cast=int)
+max_requests_jitter = env('WEB_MAX_REQUESTS_JITTER', default=1000, cast=int)
+# Seconds a stopping or recycled worker gets to finish its requests
+graceful_timeout = env('WEB_GRACEFUL_TIMEOUT', default=30, cast=int)
+timeout = env('WEB_TIMEOUT', default=60, cast=int)
+keepalive = env('WEB_KEEPALIVE', default=5, cast=int)
+
+accesslog = env('WEB_ACCESS_LOG', default=None)
+errorlog = '-'
+loglevel = env('WEB_LOG_LEVEL', default='info')
+if os.path.isdir('/dev/shm'):
+    # Heartbeat files in memory, a slow container disk stalls workers
+    worker_tmp_dir = '/dev/shm'
+
+
+def post_fork(server, worker):
+    """Resets the state a worker inherited from a preloading master."""
+    if 'db' in sys.modules:
+        sys.modules['db'].reset_engines_after_fork()
+    if 'auth.hashing' in sys.modules:
+        sys.modules['auth.hashing'].password_hasher.reset_after_fork()
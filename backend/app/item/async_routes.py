@@ -0,0 +1,170 @@
+"""Async routes for items."""
+
+from typing import Annotated, Sequence
+from fastapi import APIRouter, Body, Query, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from auth.dependencies import AsyncHasPermissions
+from auth.models import Principal
+from dependencies import ListPaginationDependency, get_async_session
+from item import crud
+from item.relationships import ItemWithRelationships
+from .models import BulkItemResult, BulkItemUpdate, ItemCreate, ItemUpdate
+from utils.export import ExportFormat
+
+async_item_router = APIRouter(
+    prefix='/api/v1/items',
+    tags=['items'],
+    responses={404: {'detail': 'Not found'}},
+)
+
+(
+    user_is_owner_or_admin,
+    user_is_owner,
+    user_is_admin,
+    user_is_authenticated,
+) = crud.item_permissions(AsyncHasPermissions)
+
+
+@async_item_router.get(
+    '/',
+    dependencies=[Depends(user_is_authenticated)],
+    response_model=Sequence[ItemWithRelationships],
+)
+async def get_items(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    pagination: Annotated[ListPaginationDependency, Depends()],
+    response: Response,
+    name: Annotated[(str | None), Query(max_length=50)] = None,
+):
+    """Get items."""
+    return await session.run_sync(crud.get_items, pagination, response, name)
+
+
+@async_item_router.get(
+    '/search/',
+    dependencies=[Depends(user_is_authenticated)],
+    response_model=Sequence[ItemWithRelationships],
+)
+async def search_items(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    pagination: Annotated[ListPaginationDependency, Depends()],
+    q: Annotated[str, Query(min_length=3, max_length=50)],
+):
+    """Search items by name and description, best match first."""
+    return await session.run_sync(crud.search_items, pagination, q)
+
+
+@async_item_router.post(
+    '/bulk/',
+    dependencies=[
+        Depends(user_is_authenticated),
+    ],
+    response_model=list[BulkItemResult],
+)
+async def create_items_bulk(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    new_items: list[ItemCreate],
+):
+    """Create a batch of items in one transaction."""
+    return await session.run_sync(crud.create_items_bulk, new_items)
+
+
+@async_item_router.put('/bulk/', response_model=list[BulkItemResult])
+async def update_items_bulk(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    principal: Annotated[Principal, Depends(user_is_authenticated)],
+    new_items: list[BulkItemUpdate],
+):
+    """Update a batch of items in one transaction, reporting each row."""
+    return await session.run_sync(
+        crud.update_items_bulk, user_is_owner_or_admin, principal, new_items
+    )
+
+
+@async_item_router.delete('/bulk/', response_model=list[BulkItemResult])
+async def delete_items_bulk(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    principal: Annotated[Principal, Depends(user_is_authenticated)],
+    ids: Annotated[list[int], Body()],
+):
+    """Delete a batch of items in one transaction, reporting each row."""
+    return await session.run_sync(
+        crud.delete_items_bulk, user_is_owner_or_admin, principal, ids
+    )
+
+
+@async_item_router.post(
+    '/',
+    dependencies=[
+        Depends(user_is_authenticated),
+    ],
+    response_model=ItemWithRelationships,
+)
+async def create_item(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    new_item: ItemCreate,
+):
+    """Create an item."""
+    return await session.run_sync(crud.create_item, new_item)
+
+
+@async_item_router.get(
+    '/export/',
+    dependencies=[Depends(user_is_authenticated)],
+    response_class=StreamingResponse,
+)
+async def export_items(
+    export_format: Annotated[ExportFormat, Query(alias='format')] = 'ndjson',
+    updated_since: Annotated[(float | None), Query(ge=0)] = None,
+):
+    """Stream items as NDJSON or CSV, all or those updated since updated_since."""
+    return crud.export_items(export_format, updated_since)
+
+
+@async_item_router.get(
+    '/{object_id}/',
+    dependencies=[
+        Depends(user_is_owner_or_admin),
+    ],
+    response_model=ItemWithRelationships,
+)
+async def get_item(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    request: Request,
+    response: Response,
+    object_id: int,
+):
+    """Get a single item, or 304 when If-None-Match holds its current ETag."""
+    return await session.run_sync(crud.get_item, request, response, object_id)
+
+
+@async_item_router.put(
+    '/{object_id}/',
+    dependencies=[
+        Depends(user_is_owner_or_admin),
+    ],
+    response_model=ItemWithRelationships,
+)
+async def update_item(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    object_id: int,
+    new_item: ItemUpdate,
+):
+    """Update a single item."""
+    return await session.run_sync(crud.update_item, object_id, new_item)
+
+
+@async_item_router.delete(
+    '/{object_id}/',
+    dependencies=[
+        Depends(user_is_owner_or_admin),
+    ],
+)
+async def delete_item(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    object_id: int,
+):
+    """Deletes a single item."""
+    return await session.run_sync(crud.delete_item, object_id)
@@ -0,0 +1,168 @@
+"""Batched item writes shared by the sync and async item routers.
+
+Each function runs on a sync Session (the async routers call them through
+AsyncSession.run_sync), checks ownership for the whole batch with one query
+and writes every permitted row with a single executemany before committing
+once. The versions of the written items and of their owners, old and new,
+are bumped in the same transaction.
+"""
+
+from typing import Any, Sequence
+
+from decouple import config
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+from sqlmodel import select
+
+from auth.dependencies import HasPermissions
+from auth.models import Principal
+from item.models import BulkItemResult, BulkItemUpdate, Item, ItemCreate
+from user.models import User
+from utils.etag import bump_versions
+from utils.models import create_unique_slugs
+
+BULK_MAX_BATCH_SIZE = config('BULK_MAX_BATCH_SIZE', default=500, cast=int)
+
+
+def check_batch_size(rows: Sequence[Any]) -> None:
+    if not rows:
+        raise HTTPException(status_code=400, detail='Empty batch.')
+    if len(rows) > BULK_MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f'Batch exceeds {BULK_MAX_BATCH_SIZE} items.',
+        )
+
+
+def check_batch_permissions(
+    session: Session,
+    permission: HasPermissions,
+    principal: Principal,
+    ids: Sequence[int],
+) -> tuple[dict[int, int | None], list[BulkItemResult]]:
+    """Splits ids into the permitted ones, with their owner ids, and per-row
+    rejections.
+
+    Existence and ownership of the whole batch come from a single query.
+    """
+    rows = {
+        row.id: row
+        for row in session.execute(
+            select(Item.id, Item.owner_id).where(Item.id.in_(set(ids)))  # type: ignore
+        )
+    }
+    permitted: dict[int, int | None] = {}
+    rejected: list[BulkItemResult] = []
+    seen: set[int] = set()
+    for index, object_id in enumerate(ids):
+        if object_id in seen:
+            rejected.append(
+                BulkItemResult(
+                    index=index, id=object_id, status=400, detail='Duplicate id.'
+                )
+            )
+        elif object_id not in rows:
+            rejected.append(
+                BulkItemResult(
+                    index=index, id=object_id, status=404, detail='Item not found.'
+                )
+            )
+        elif not (
+            permission.has_valid_roles(principal)
+            or permission.is_owner(principal, rows[object_id])
+        ):
+            rejected.append(
+                BulkItemResult(
+                    index=index,
+                    id=object_id,
+                    status=403,
+                    detail='Not enough permissions.',
+                )
+            )
+        else:
+            permitted[object_id] = rows[object_id].owner_id
+        seen.add(object_id)
+    return permitted, rejected
+
+
+def sort_results(
+    done: list[BulkItemResult], rejected: list[BulkItemResult]
+) -> list[BulkItemResult]:
+    return sorted(done + rejected, key=lambda result: result.index)
+
+
+def create_items(
+    session: Session, new_items: Sequence[ItemCreate]
+) -> list[BulkItemResult]:
+    """Inserts every item in one executemany and returns their ids."""
+    slugs = create_unique_slugs(session, Item, new_items)
+    rows = [
+        {**new_item.model_dump(), 'slug': slug}
+        for new_item, slug in zip(new_items, slugs)
+    ]
+    ids = session.scalars(
+        insert(Item).returning(Item.id, sort_by_parameter_order=True),  # type: ignore
+        rows,
+    ).all()
+    bump_versions(session, User, [row['owner_id'] for row in rows])
+    session.commit()
+    return [
+        BulkItemResult(index=index, id=object_id, status=201)
+        for index, object_id in enumerate(ids)
+    ]
+
+
+def update_items(
+    session: Session,
+    permission: HasPermissions,
+    principal: Principal,
+    new_items: Sequence[BulkItemUpdate],
+) -> list[BulkItemResult]:
+    """Updates the permitted items by primary key in one executemany."""
+    permitted, rejected = check_batch_permissions(
+        session, permission, principal, [new_item.id for new_item in new_items]
+    )
+    permitted_ids = set(permitted)
+    done: list[BulkItemResult] = []
+    rows: list[dict[str, Any]] = []
+    for index, new_item in enumerate(new_items):
+        if new_item.id in permitted_ids:
+            permitted_ids.discard(new_item.id)
+            values = new_item.model_dump(exclude_unset=True)
+            # Rows with nothing but the id have nothing to write
+            if len(values) > 1:
+                rows.append(values)
+            done.append(BulkItemResult(index=index, id=new_item.id, status=200))
+    if rows:
+        session.execute(update(Item), rows)
+        bump_versions(session, Item, [row['id'] for row in rows])
+        bump_versions(
+            session,
+            User,
+            [permitted[row['id']] for row in rows]
+            + [row['owner_id'] for row in rows if 'owner_id' in row],
+        )
+        session.commit()
+    return sort_results(done, rejected)
+
+
+def delete_items(
+    session: Session,
+    permission: HasPermissions,
+    principal: Principal,
+    ids: Sequence[int],
+) -> list[BulkItemResult]:
+    """Deletes the permitted items with a single statement."""
+    permitted, rejected = check_batch_permissions(session, permission, principal, ids)
+    if permitted:
+        session.execute(delete(Item).where(Item.id.in_(list(permitted))))  # type: ignore
+        bump_versions(session, User, permitted.values())
+        session.commit()
+    permitted_ids = set(permitted)
+    done = []
+    for index, object_id in enumerate(ids):
+        if object_id in permitted_ids:
+            permitted_ids.discard(object_id)
+            done.append(BulkItemResult(index=index, id=object_id, status=200))
+    return sort_results(done, rejected)
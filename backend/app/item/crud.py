@@ -0,0 +1,226 @@
+"""Item route bodies shared by the sync and async item routers.
+
+Each function runs on a sync Session, the async router calls them through
+AsyncSession.run_sync, and maps unexpected errors to the route's 400 the
+same way in both modes. Responses are serialized here, so relationships
+still load lazily on the async path.
+"""
+
+from typing import Any, NamedTuple, Sequence
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
+
+from auth.dependencies import HasPermissions
+from auth.models import Principal
+from dependencies import ListPaginationDependency
+from item.bulk import check_batch_size, create_items, delete_items, update_items
+from item.models import BulkItemResult, BulkItemUpdate, Item, ItemCreate, ItemUpdate
+from item.relationships import (
+    item_adapter,
+    items_adapter,
+    ItemWithRelationships,
+    item_relationship_options,
+    item_versions,
+    item_versions_statement,
+)
+from user.models import User
+from utils.etag import (
+    bump_versions,
+    current_etag,
+    etag_matches,
+    make_etag,
+    not_modified,
+)
+from utils.export import ExportFormat, export_response, export_statement
+from utils.models import create_unique_slugs
+from utils.search import ranked_search, where_contains
+from utils.serialization import model_response
+
+
+class ItemPermissions(NamedTuple):
+    owner_or_admin: HasPermissions
+    owner: HasPermissions
+    admin: HasPermissions
+    authenticated: HasPermissions
+
+
+def item_permissions(permission_class: type[HasPermissions]) -> ItemPermissions:
+    """The item checks, built with HasPermissions or AsyncHasPermissions."""
+    return ItemPermissions(
+        owner_or_admin=permission_class(
+            object_model=Item, valid_roles=['Administrator'], check_owner=True
+        ),
+        owner=permission_class(object_model=Item, check_owner=True),
+        admin=permission_class(object_model=Item, valid_roles=['Administrator']),
+        authenticated=permission_class(object_model=Item),
+    )
+
+
+def get_items(
+    session: Session,
+    pagination: ListPaginationDependency,
+    response: Response,
+    name: str | None,
+) -> Response:
+    try:
+        statement = select(Item).options(*item_relationship_options)
+        statement = where_contains(statement, Item, 'name', name)
+        statement = pagination.paginate(statement, Item.name, Item.id)
+        items = session.exec(statement).all()
+        pagination.set_next_cursor(response, items, 'name')
+        return model_response(items_adapter, items, response)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(
+            status_code=400, detail='Error fetching item list.'
+        ) from error
+
+
+def search_items(
+    session: Session, pagination: ListPaginationDependency, q: str
+) -> Response:
+    try:
+        statement = (
+            ranked_search(Item, q)
+            .options(*item_relationship_options)
+            .offset(pagination.offset)
+            .limit(pagination.limit)
+        )
+        items = session.exec(statement).all()
+        return model_response(items_adapter, items)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error searching items.') from error
+
+
+def create_items_bulk(
+    session: Session, new_items: Sequence[ItemCreate]
+) -> list[BulkItemResult]:
+    try:
+        check_batch_size(new_items)
+        return create_items(session, new_items)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error creating items.') from error
+
+
+def update_items_bulk(
+    session: Session,
+    permission: HasPermissions,
+    principal: Principal,
+    new_items: Sequence[BulkItemUpdate],
+) -> list[BulkItemResult]:
+    try:
+        check_batch_size(new_items)
+        return update_items(session, permission, principal, new_items)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error updating items.') from error
+
+
+def delete_items_bulk(
+    session: Session,
+    permission: HasPermissions,
+    principal: Principal,
+    ids: Sequence[int],
+) -> list[BulkItemResult]:
+    try:
+        check_batch_size(ids)
+        return delete_items(session, permission, principal, ids)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error deleting items.') from error
+
+
+def create_item(session: Session, new_item: ItemCreate) -> Response:
+    try:
+        slug = create_unique_slugs(session, Item, [new_item])[0]
+        db_item = Item.model_validate(new_item, update={'slug': slug})
+        session.add(db_item)
+        bump_versions(session, User, [db_item.owner_id])
+        session.commit()
+        session.refresh(db_item)
+        return model_response(item_adapter, db_item)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error creating item.') from error
+
+
+def export_items(
+    export_format: ExportFormat, updated_since: float | None
+) -> StreamingResponse:
+    try:
+        statement = export_statement(Item, item_relationship_options, updated_since)
+        return export_response(statement, ItemWithRelationships, export_format, 'items')
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error exporting items.') from error
+
+
+def get_item(
+    session: Session, request: Request, response: Response, object_id: int
+) -> Response:
+    try:
+        # Without If-None-Match the ETag comes from the loaded object
+        if 'if-none-match' in request.headers:
+            etag = current_etag(session, item_versions_statement(object_id))
+            if etag and etag_matches(request, etag):
+                return not_modified(etag)
+        item: Item | None = session.get(
+            Item, object_id, options=item_relationship_options
+        )
+        if item:
+            response.headers['ETag'] = make_etag(item_versions(item))
+            return model_response(item_adapter, item, response)
+        raise HTTPException(status_code=404, detail='Item not found.')
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error fetching item.') from error
+
+
+def update_item(session: Session, object_id: int, new_item: ItemUpdate) -> Response:
+    try:
+        # Get item
+        item: Item | None = session.get(Item, object_id)
+        if item:
+            previous_owner_id = item.owner_id
+            # Update item
+            new_item_data: dict[str, Any] = new_item.model_dump(exclude_unset=True)
+            item.sqlmodel_update(new_item_data)
+            # Saves item, bumping its version and its owners'
+            session.add(item)
+            bump_versions(session, Item, [object_id])
+            bump_versions(session, User, [previous_owner_id, item.owner_id])
+            session.commit()
+            session.refresh(item)
+            return model_response(item_adapter, item)
+        raise HTTPException(status_code=404, detail='Item not found.')
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error updating item.') from error
+
+
+def delete_item(session: Session, object_id: int) -> dict[str, bool]:
+    try:
+        item = session.get(Item, object_id)
+        if item:
+            bump_versions(session, User, [item.owner_id])
+            session.delete(item)
+            session.commit()
+            return {'deleted': True}
+        raise HTTPException(status_code=404, detail='Item not found')
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error deleting item.') from error
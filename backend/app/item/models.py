@@ -1,7 +1,7 @@
 from typing import TYPE_CHECKING
 from sqlmodel import Relationship, SQLModel, Field
 
-from utils.models import SluggifiedModel
+from utils.models import SluggifiedModel, VersionedModel
 
 if TYPE_CHECKING:
     from user.models import User
@@ -10,11 +10,11 @@ if TYPE_CHECKING:
 class BaseItem(SQLModel):
     """Main Item representation."""
 
-    name: str = Field(max_length=200)
+    name: str = Field(max_length=200, index=True)
     description: str | None = Field(max_length=1000, default=None)
     price: float = Field(default=0)
     tax: float = Field(default=13)
-    owner_id: int | None = Field(default=None, foreign_key='user.id')
+    owner_id: int | None = Field(default=None, foreign_key='user.id', index=True)
 
 
 class ItemUpdate(SQLModel):
@@ -31,8 +31,29 @@ class ItemCreate(BaseItem):
     """Used to create Item objects."""
 
 
-class Item(SluggifiedModel, BaseItem, table=True):
+class ItemSummary(SluggifiedModel, BaseItem):
+    """Item without its owner or row version."""
+
+    id: int
+
+
+class Item(SluggifiedModel, VersionedModel, BaseItem, table=True):
     """DB Item."""
 
     id: int | None = Field(default=None, primary_key=True)
     owner: 'User' = Relationship(back_populates='items')
+
+
+class BulkItemUpdate(ItemUpdate):
+    """Used to update Item objects in bulk."""
+
+    id: int
+
+
+class BulkItemResult(SQLModel):
+    """Outcome of a single row of a bulk request."""
+
+    index: int
+    id: int | None = None
+    status: int
+    detail: str | None = None
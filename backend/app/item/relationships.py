@@ -1,8 +1,32 @@
-from item.models import BaseItem
-from user.models import UserSafe
+from pydantic import TypeAdapter
+from sqlalchemy import Select, select
+from sqlalchemy.orm import joinedload
+
+from item.models import BaseItem, Item
+from user.models import User, UserSafe
 from utils.models import SluggifiedModel
 
 
 class ItemWithRelationships(SluggifiedModel, BaseItem):
     id: int
     owner: UserSafe | None
+
+
+item_adapter = TypeAdapter(ItemWithRelationships)
+items_adapter = TypeAdapter(list[ItemWithRelationships])
+
+# Loads what ItemWithRelationships serializes in the same query
+item_relationship_options = [joinedload(Item.owner)]  # type: ignore
+
+
+def item_versions_statement(object_id: int) -> Select:
+    """Selects the versions of the rows ItemWithRelationships serializes."""
+    return (
+        select(Item.version, User.version)
+        .outerjoin(User, Item.owner_id == User.id)  # type: ignore
+        .where(Item.id == object_id)
+    )
+
+
+def item_versions(item: Item) -> tuple[int | None, ...]:
+    return (item.version, item.owner.version if item.owner else None)
@@ -1,13 +1,24 @@
 """Routes for items."""
 
-from typing import Annotated, Any, Sequence
-from fastapi import APIRouter, HTTPException, Path, Query, Depends
-from sqlmodel import Session, col, select
+from typing import Annotated, Sequence
+from fastapi import (
+    APIRouter,
+    Body,
+    Query,
+    Depends,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
 
 from auth.dependencies import HasPermissions
+from auth.models import Principal
 from dependencies import ListPaginationDependency, get_session
+from item import crud
 from item.relationships import ItemWithRelationships
-from .models import Item, ItemCreate, ItemUpdate
+from .models import BulkItemResult, BulkItemUpdate, ItemCreate, ItemUpdate
+from utils.export import ExportFormat
 
 item_router = APIRouter(
     prefix='/api/v1/items',
@@ -15,17 +26,12 @@ item_router = APIRouter(
     responses={404: {'detail': 'Not found'}},
 )
 
-user_is_owner_or_admin = HasPermissions(
-    object_model=Item, valid_roles=['Administrator'], check_owner=True
-)
-
-user_is_owner = HasPermissions(object_model=Item, check_owner=True)
-
-user_is_admin = HasPermissions(object_model=Item, valid_roles=['Administrator'])
-
-user_is_authenticated = HasPermissions(
-    object_model=Item,
-)
+(
+    user_is_owner_or_admin,
+    user_is_owner,
+    user_is_admin,
+    user_is_authenticated,
+) = crud.item_permissions(HasPermissions)
 
 
 @item_router.get(
@@ -36,24 +42,60 @@ user_is_authenticated = HasPermissions(
 def get_items(
     session: Annotated[Session, Depends(get_session)],
     pagination: Annotated[ListPaginationDependency, Depends()],
+    response: Response,
     name: Annotated[(str | None), Query(max_length=50)] = None,
 ):
     """Get items."""
-    try:
-        statement = (
-            select(Item)
-            .where(col(Item.name).contains(name if name else ''))
-            .offset(pagination.offset)
-            .limit(pagination.limit)
-        )
-        items = session.exec(statement).all()
-        return items
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(
-            status_code=400, detail='Error fetching item list.'
-        ) from error
+    return crud.get_items(session, pagination, response, name)
+
+
+@item_router.get(
+    '/search/',
+    dependencies=[Depends(user_is_authenticated)],
+    response_model=Sequence[ItemWithRelationships],
+)
+def search_items(
+    session: Annotated[Session, Depends(get_session)],
+    pagination: Annotated[ListPaginationDependency, Depends()],
+    q: Annotated[str, Query(min_length=3, max_length=50)],
+):
+    """Search items by name and description, best match first."""
+    return crud.search_items(session, pagination, q)
+
+
+@item_router.post(
+    '/bulk/',
+    dependencies=[
+        Depends(user_is_authenticated),
+    ],
+    response_model=list[BulkItemResult],
+)
+def create_items_bulk(
+    session: Annotated[Session, Depends(get_session)],
+    new_items: list[ItemCreate],
+):
+    """Create a batch of items in one transaction."""
+    return crud.create_items_bulk(session, new_items)
+
+
+@item_router.put('/bulk/', response_model=list[BulkItemResult])
+def update_items_bulk(
+    session: Annotated[Session, Depends(get_session)],
+    principal: Annotated[Principal, Depends(user_is_authenticated)],
+    new_items: list[BulkItemUpdate],
+):
+    """Update a batch of items in one transaction, reporting each row."""
+    return crud.update_items_bulk(session, user_is_owner_or_admin, principal, new_items)
+
+
+@item_router.delete('/bulk/', response_model=list[BulkItemResult])
+def delete_items_bulk(
+    session: Annotated[Session, Depends(get_session)],
+    principal: Annotated[Principal, Depends(user_is_authenticated)],
+    ids: Annotated[list[int], Body()],
+):
+    """Delete a batch of items in one transaction, reporting each row."""
+    return crud.delete_items_bulk(session, user_is_owner_or_admin, principal, ids)
 
 
 @item_router.post(
@@ -68,16 +110,20 @@ def create_item(
     new_item: ItemCreate,
 ):
     """Create an item."""
-    try:
-        db_item = Item.model_validate(new_item)
-        session.add(db_item)
-        session.commit()
-        session.refresh(db_item)
-        return db_item
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(status_code=400, detail='Error creating item.') from error
+    return crud.create_item(session, new_item)
+
+
+@item_router.get(
+    '/export/',
+    dependencies=[Depends(user_is_authenticated)],
+    response_class=StreamingResponse,
+)
+def export_items(
+    export_format: Annotated[ExportFormat, Query(alias='format')] = 'ndjson',
+    updated_since: Annotated[(float | None), Query(ge=0)] = None,
+):
+    """Stream items as NDJSON or CSV, all or those updated since updated_since."""
+    return crud.export_items(export_format, updated_since)
 
 
 @item_router.get(
@@ -89,24 +135,18 @@ def create_item(
 )
 def get_item(
     session: Annotated[Session, Depends(get_session)],
+    request: Request,
+    response: Response,
     object_id: int,
 ):
-    """Get a single item."""
-    try:
-        item: Item | None = session.get(Item, object_id)
-        if item:
-            return item
-        raise HTTPException(status_code=404, detail='Item not found.')
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(status_code=400, detail='Error fetching item.') from error
+    """Get a single item, or 304 when If-None-Match holds its current ETag."""
+    return crud.get_item(session, request, response, object_id)
 
 
 @item_router.put(
     '/{object_id}/',
     dependencies=[
-        Depends(user_is_owner),
+        Depends(user_is_owner_or_admin),
     ],
     response_model=ItemWithRelationships,
 )
@@ -116,29 +156,13 @@ def update_item(
     new_item: ItemUpdate,
 ):
     """Update a single item."""
-    try:
-        # Get item
-        item: Item | None = session.get(Item, object_id)
-        if item:
-            # Update item
-            new_item_data: dict[str, Any] = new_item.model_dump(exclude_unset=True)
-            item.sqlmodel_update(new_item_data)
-            # Saves item
-            session.add(item)
-            session.commit()
-            session.refresh(item)
-            return item
-        raise HTTPException(status_code=404, detail='Item not found.')
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(status_code=400, detail='Error updating item.') from error
+    return crud.update_item(session, object_id, new_item)
 
 
 @item_router.delete(
     '/{object_id}/',
     dependencies=[
-        Depends(user_is_owner),
+        Depends(user_is_owner_or_admin),
     ],
 )
 def delete_item(
@@ -146,14 +170,4 @@ def delete_item(
     object_id: int,
 ):
     """Deletes a single item."""
-    try:
-        item = session.get(Item, object_id)
-        if item:
-            session.delete(item)
-            session.commit()
-            return {'deleted': True}
-        raise HTTPException(status_code=404, detail='Item not found')
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(status_code=400, detail='Error deleting item.') from error
+    return crud.delete_item(session, object_id)
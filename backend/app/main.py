@@ -1,88 +1,177 @@
-"""Main FastAPI app module."""
-
-from fastapi import FastAPI, Request
+"""Main FastAPI app module.
+
+create_app builds the app from Settings and imports only the routers the
+settings select. The engines and the password context are created on first
+use, so a new worker reaches its first response sooner. Servers supporting
+factories call create_app, as gunicorn does with `main:create_app()`.
+`app` is built from the environment on first access, for
+`fastapi run app/main.py`, so importing main builds nothing.
+"""
+
+import argparse
+import json
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Iterable
+
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
-
-from auth.routes import auth_router
-from user.routes import user_router
-from group.routes import group_router
-from item.routes import item_router
-from db import create_db_and_tables, drop_tables
-from utils.utils import create_groups, create_items, create_users
-
-# CORS setup
-origins: list[str] = [
-    'https://jdiaz.akamaized.net',
-    'https://jdiaz.akamaized.edgesuite.net',
-    'https://69.164.193.198',
-    'https://127.0.0.1:80',
-    'https://127.0.0.1:8000',
-    'http://jdiaz.akamaized.net',
-    'http://jdiaz.akamaized.edgesuite.net',
-    'http://69.164.193.198',
-    'http://127.0.0.1:80',
-    'http://127.0.0.1:8000',
-]
-
-# Main app
-app = FastAPI(title='Test API with FastAPI', version='1.0.0')
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=['*'],
-    allow_headers=['*'],
-)
-
-app.include_router(router=auth_router)
-app.include_router(router=user_router)
-app.include_router(router=group_router)
-app.include_router(router=item_router)
-
-app.mount(
-    '/assets',
-    StaticFiles(directory='../dist/assets'),
-    name='assets',
-)
-
-
-@app.on_event('startup')
-def on_startup():
-    pass
-    # drop_tables()
-    # create_db_and_tables()
-    # create_groups()
-    # create_users()
-    # create_items()
-
-
-@app.get('/')
-def get_main_page():
-    """Get main page."""
-    return FileResponse('../dist/index.html')
-
-
-@app.get('/login/')
-def get_login_page():
-    """Get login page."""
-    return FileResponse('../dist/login.html')
-
-
-# Linode Akamaized certificate validation file
-
-# @app.get('/.well-known/pki-validation/7AE15A7223EE5C942C79E9196DC6E51A.txt')
-# def certificate_verification():
-#     return FileResponse('../cert/7AE15A7223EE5C942C79E9196DC6E51A.txt')
-
-
-@app.get('/{full_path:path}')
-def last_resort(
-    request: Request,
-    full_path: str,
-) -> dict:
-    """Catches all undefined paths."""
-    print(f'Got path: {full_path}')
-    return {'detail': f'Not Found. Try {request.base_url}docs'}
+
+from settings import Settings
+from utils.serialization import ORJSONResponse
+from utils.static import HtmlShell, PrecompressedStaticFiles, prepare_static_files
+
+logger = logging.getLogger(__name__)
+
+
+def load_routers(settings: Settings) -> list[APIRouter]:
+    """Imports the routers, the sync or async ones but never both."""
+    from auth.routes import auth_router
+    from monitoring.routes import admin_monitoring_router, metrics_router
+
+    # user first, the user model resolves its relationships to the others
+    if settings.async_database:
+        from user.async_routes import async_user_router as user_router
+        from group.async_routes import async_group_router as group_router
+        from item.async_routes import async_item_router as item_router
+    else:
+        from user.routes import user_router
+        from group.routes import group_router
+        from item.routes import item_router
+    return [
+        auth_router,
+        user_router,
+        group_router,
+        item_router,
+        admin_monitoring_router(settings.async_database),
+        metrics_router,
+    ]
+
+
+def seed_database() -> None:
+    from utils.utils import create_groups, create_items, create_users
+
+    create_groups()
+    create_users()
+    create_items()
+
+
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """Builds the app, from the environment when no settings are given."""
+    settings = settings or Settings.from_env()
+    index_page = HtmlShell(f'{settings.dist_directory}/index.html')
+    login_page = HtmlShell(f'{settings.dist_directory}/login.html')
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        from auth.hashing import password_hasher
+        from db import create_db_and_tables, dispose_engines
+
+        prepare_static_files(settings.dist_directory, [index_page, login_page])
+        if settings.create_tables:
+            create_db_and_tables()
+        if settings.seed_database:
+            seed_database()
+        yield
+        password_hasher.shutdown()
+        await dispose_engines()
+
+    # Wrapped in Default so routes with a response_model keep FastAPI's
+    # pydantic-core fast path, orjson renders the routes without one
+    app = FastAPI(
+        title=settings.title,
+        version=settings.version,
+        default_response_class=Default(ORJSONResponse),
+        lifespan=lifespan,
+    )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=list(settings.cors_origins),
+        allow_credentials=True,
+        allow_methods=['*'],
+        allow_headers=['*'],
+        expose_headers=['X-Next-Cursor', 'Server-Timing', 'ETag'],
+    )
+    if settings.api_compression:
+        from utils.compression import CompressionMiddleware
+
+        app.add_middleware(CompressionMiddleware)
+    if settings.sql_tracking:
+        from monitoring.queries import QueryTrackingMiddleware
+
+        app.add_middleware(QueryTrackingMiddleware)
+    if settings.metrics:
+        from monitoring.metrics import MetricsMiddleware
+
+        # Added last so it is the outermost middleware and times everything
+        app.add_middleware(MetricsMiddleware)
+
+    for router in load_routers(settings):
+        app.include_router(router=router)
+
+    app.mount(
+        '/assets',
+        PrecompressedStaticFiles(directory=f'{settings.dist_directory}/assets'),
+        name='assets',
+    )
+
+    @app.get('/')
+    async def get_main_page(request: Request):
+        """Get main page."""
+        return index_page.response(request)
+
+    @app.get('/login/')
+    async def get_login_page(request: Request):
+        """Get login page."""
+        return login_page.response(request)
+
+    # Linode Akamaized certificate validation file
+
+    # @app.get('/.well-known/pki-validation/7AE15A7223EE5C942C79E9196DC6E51A.txt')
+    # def certificate_verification():
+    #     return FileResponse('../cert/7AE15A7223EE5C942C79E9196DC6E51A.txt')
+
+    @app.get('/{full_path:path}')
+    def last_resort(
+        request: Request,
+        full_path: str,
+    ) -> dict:
+        """Catches all undefined paths."""
+        logger.info('Got path: %s', full_path)
+        return {'detail': f'Not Found. Try {request.base_url}docs'}
+
+    if settings.openapi_file:
+        schema = json.loads(Path(settings.openapi_file).read_text())
+        # Replaces the generator, as FastAPI documents for custom schemas
+        app.openapi = lambda: schema  # type: ignore[method-assign]
+    return app
+
+
+def __getattr__(name: str) -> FastAPI:
+    """Builds `app` on first access, importing main stays cheap."""
+    if name != 'app':
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    app = globals()['app'] = create_app()
+    return app
+
+
+def __dir__() -> list[str]:
+    # Lists `app` before it is built, tools find the app through dir()
+    return [*globals(), 'app']
+
+
+def main(arguments: Iterable[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description='Tools for the app.')
+    parser.add_argument(
+        '--openapi', type=Path, help='write the OpenAPI schema to this file'
+    )
+    args = parser.parse_args(arguments)
+    if args.openapi:
+        args.openapi.write_text(json.dumps(create_app().openapi()))
+        print(f'OpenAPI schema written to {args.openapi}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""add fts5 search indexes
+
+Revision ID: 5f2c8e1a9b3d
+Revises: 43bcea6145de
+Create Date: 2026-10-18 10:12:41.503117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2c8e1a9b3d'
+down_revision: Union[str, None] = '43bcea6145de'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Kept inline so later changes to utils.search do not alter this revision
+SEARCH_INDEXES = {
+    'item': ('name', 'description'),
+    'user': ('first_name', 'last_name', 'username'),
+    'grouppermission': ('name',),
+}
+
+
+def upgrade() -> None:
+    for table, columns in SEARCH_INDEXES.items():
+        fts = f'{table}_fts'
+        names = ', '.join(columns)
+        new_values = ', '.join(f'new.{name}' for name in columns)
+        old_values = ', '.join(f'old.{name}' for name in columns)
+        delete_old = (
+            f'INSERT INTO {fts}({fts}, rowid, {names}) '
+            f"VALUES ('delete', old.id, {old_values});"
+        )
+        insert_new = f'INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values});'
+        op.execute(
+            f'CREATE VIRTUAL TABLE {fts} USING fts5('
+            f"{names}, content='{table}', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(
+            f'CREATE TRIGGER {fts}_ai AFTER INSERT ON "{table}" BEGIN {insert_new} END'
+        )
+        op.execute(
+            f'CREATE TRIGGER {fts}_ad AFTER DELETE ON "{table}" BEGIN {delete_old} END'
+        )
+        op.execute(
+            f'CREATE TRIGGER {fts}_au AFTER UPDATE OF {names} ON "{table}" '
+            f'BEGIN {delete_old} {insert_new} END'
+        )
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    for table in SEARCH_INDEXES:
+        fts = f'{table}_fts'
+        op.execute(f'DROP TRIGGER IF EXISTS {fts}_au')
+        op.execute(f'DROP TRIGGER IF EXISTS {fts}_ad')
+        op.execute(f'DROP TRIGGER IF EXISTS {fts}_ai')
+        op.execute(f'DROP TABLE IF EXISTS {fts}')
@@ -0,0 +1,250 @@
+"""In-process request metrics rendered in the Prometheus text format.
+
+Every counter is updated from the event loop thread, so plain integers and
+dicts are enough and no lock is taken on the request path.
+"""
+
+from bisect import bisect_left
+from time import perf_counter
+from typing import Iterator
+
+import anyio.to_thread
+from decouple import config
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+
+# Upper bounds in seconds, the Prometheus client defaults
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+DB_QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+THREADPOOL_WAITING_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    """Bucketed observations, cumulated only when rendered."""
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterator[tuple[str, int]]:
+        total = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            yield str(bound), total
+
+
+def escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    pairs = ','.join(
+        f'{name}="{escape_label(value)}"' for name, value in labels.items()
+    )
+    return '{' + pairs + '}'
+
+
+class RequestMetrics:
+    """Latency, status and concurrency metrics for the HTTP requests served."""
+
+    def __init__(self) -> None:
+        self.in_flight: dict[str, int] = {}
+        self.responses: dict[tuple[str, str, str], int] = {}
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.threadpool_waiting = Histogram(THREADPOOL_WAITING_BUCKETS)
+        self.db_queries: dict[tuple[str, str], Histogram] = {}
+        self.db_seconds: dict[tuple[str, str], Histogram] = {}
+        self.shed: dict[str, int] = {}
+
+    def started(self, method: str) -> None:
+        self.in_flight[method] = self.in_flight.get(method, 0) + 1
+        # Sync endpoints and dependencies queue on anyio's default limiter,
+        # its public statistics show how many wait for a thread right now
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        self.threadpool_waiting.observe(limiter.statistics().tasks_waiting)
+
+    def finished(self, method: str, route: str, status: int, seconds: float) -> None:
+        self.in_flight[method] -= 1
+        key = (method, route, str(status))
+        self.responses[key] = self.responses.get(key, 0) + 1
+        histogram = self.latency.get((method, route))
+        if histogram is None:
+            histogram = self.latency[(method, route)] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+
+    def observed_queries(
+        self, method: str, route: str, count: int, seconds: float
+    ) -> None:
+        """Records the statements and database time of one request."""
+        key = (method, route)
+        if key not in self.db_queries:
+            self.db_queries[key] = Histogram(DB_QUERIES_BUCKETS)
+            self.db_seconds[key] = Histogram(DB_SECONDS_BUCKETS)
+        self.db_queries[key].observe(count)
+        self.db_seconds[key].observe(seconds)
+
+    def shed_request(self, reason: str) -> None:
+        """Counts a request rejected by admission control before any work."""
+        self.shed[reason] = self.shed.get(reason, 0) + 1
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        lines = [
+            '# HELP http_requests_in_flight Requests being handled.',
+            '# TYPE http_requests_in_flight gauge',
+        ]
+        lines.extend(
+            f'http_requests_in_flight{format_labels({"method": method})} {count}'
+            for method, count in sorted(self.in_flight.items())
+        )
+        lines.extend(
+            [
+                (
+                    '# HELP http_responses_total '
+                    'Responses sent, by route and status code.'
+                ),
+                '# TYPE http_responses_total counter',
+            ]
+        )
+        for (method, route, status), count in sorted(self.responses.items()):
+            labels = {'method': method, 'route': route, 'status': status}
+            lines.append(f'http_responses_total{format_labels(labels)} {count}')
+        lines.extend(
+            [
+                (
+                    '# HELP http_request_duration_seconds '
+                    'Time to the end of the response body.'
+                ),
+                '# TYPE http_request_duration_seconds histogram',
+            ]
+        )
+        for (method, route), histogram in sorted(self.latency.items()):
+            lines.extend(
+                render_histogram(
+                    'http_request_duration_seconds',
+                    histogram,
+                    {'method': method, 'route': route},
+                )
+            )
+        for name, help_text, histograms in (
+            (
+                'db_queries_per_request',
+                'Statements run per request.',
+                self.db_queries,
+            ),
+            (
+                'db_seconds_per_request',
+                'Time spent running statements per request.',
+                self.db_seconds,
+            ),
+        ):
+            lines.extend([f'# HELP {name} {help_text}', f'# TYPE {name} histogram'])
+            for (method, route), histogram in sorted(histograms.items()):
+                lines.extend(
+                    render_histogram(
+                        name, histogram, {'method': method, 'route': route}
+                    )
+                )
+        lines.extend(
+            [
+                (
+                    '# HELP http_requests_shed_total '
+                    'Requests rejected by admission control.'
+                ),
+                '# TYPE http_requests_shed_total counter',
+            ]
+        )
+        lines.extend(
+            f'http_requests_shed_total{format_labels({"reason": reason})} {count}'
+            for reason, count in sorted(self.shed.items())
+        )
+        lines.extend(
+            [
+                (
+                    '# HELP threadpool_tasks_waiting '
+                    'Sync calls waiting for a worker thread as each request starts.'
+                ),
+                '# TYPE threadpool_tasks_waiting histogram',
+            ]
+        )
+        lines.extend(
+            render_histogram('threadpool_tasks_waiting', self.threadpool_waiting, {})
+        )
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        lines.extend(
+            [
+                '# HELP threadpool_threads_busy Worker threads running a call.',
+                '# TYPE threadpool_threads_busy gauge',
+                f'threadpool_threads_busy {limiter.borrowed_tokens}',
+                '# HELP threadpool_threads_max Size of the worker thread limiter.',
+                '# TYPE threadpool_threads_max gauge',
+                f'threadpool_threads_max {limiter.total_tokens}',
+            ]
+        )
+        return '\n'.join(lines) + '\n'
+
+
+def render_histogram(
+    name: str, histogram: Histogram, labels: dict[str, str]
+) -> list[str]:
+    lines = [
+        f'{name}_bucket{format_labels({**labels, "le": bound})} {count}'
+        for bound, count in histogram.cumulative()
+    ]
+    suffix = format_labels(labels) if labels else ''
+    lines.append(f'{name}_sum{suffix} {histogram.sum}')
+    lines.append(f'{name}_count{suffix} {histogram.count}')
+    return lines
+
+
+request_metrics = RequestMetrics()
+
+
+def route_template(scope: Scope) -> str:
+    """Returns the path template of the matched route, never the raw path."""
+    route = scope.get('route')
+    if route is not None and hasattr(route, 'path'):
+        return route.path
+    if scope.get('root_path'):
+        # Mounted apps such as the static assets
+        return f'{scope["root_path"]}/{{path:path}}'
+    return 'unmatched'
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every HTTP request until its body is sent."""
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics = request_metrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        method = scope['method']
+        started = perf_counter()
+        self.metrics.started(method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.finished(
+                method, route_template(scope), status, perf_counter() - started
+            )
@@ -0,0 +1,107 @@
+"""Per request statement counts, Server-Timing headers and N+1 detection.
+
+The engine hooks in db.py add every statement to the RequestQueries held by
+the request_queries context variable. Sync endpoints and dependencies run on
+worker threads with a copy of the request context, so the middleware stores
+one mutable RequestQueries per request rather than values the threads would
+have to set.
+"""
+
+import logging
+from time import perf_counter
+from typing import Literal
+
+from decouple import Choices, config
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from db import RequestQueries, request_queries
+from monitoring.metrics import RequestMetrics, request_metrics, route_template
+
+SQL_TRACKING_ENABLED = config('SQL_TRACKING_ENABLED', default=True, cast=bool)
+# 'log' or 'raise' when one request repeats a statement, meant for dev and tests
+SQL_NPLUSONE_MODE: Literal['off', 'log', 'raise'] = config(
+    'SQL_NPLUSONE_MODE', default='off', cast=Choices(['off', 'log', 'raise'])
+)
+SQL_NPLUSONE_THRESHOLD = config('SQL_NPLUSONE_THRESHOLD', default=5, cast=int)
+
+logger = logging.getLogger(__name__)
+
+
+class RepeatedQueriesError(RuntimeError):
+    """A request ran the same statement shape more often than allowed,
+    usually relationships lazy loaded one row at a time."""
+
+
+def server_timing(queries: RequestQueries, seconds: float) -> str:
+    return (
+        f'app;dur={seconds * 1000:.2f}, '
+        f'db;dur={queries.seconds * 1000:.2f};desc="{queries.count} queries"'
+    )
+
+
+def check_repeated_queries(
+    queries: RequestQueries, method: str, route: str, mode: str, threshold: int
+) -> None:
+    """Logs or raises when a statement shape ran threshold times or more."""
+    if mode == 'off':
+        return
+    repeated = queries.repeated(threshold)
+    if not repeated:
+        return
+    summary = '; '.join(
+        f'{count}x {" ".join(shape.split())}' for shape, count in repeated.items()
+    )
+    message = f'{method} {route} repeated statements: {summary}'
+    if mode == 'raise':
+        raise RepeatedQueriesError(message)
+    logger.warning(message)
+
+
+class QueryTrackingMiddleware:
+    """Pure ASGI middleware counting the statements and database time of every
+    HTTP request, sent as a Server-Timing header and recorded in the metrics.
+
+    The header is written when the response starts, so statements run while
+    a streamed body is being sent only reach the metrics.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        metrics: RequestMetrics = request_metrics,
+        mode: str = SQL_NPLUSONE_MODE,
+        threshold: int = SQL_NPLUSONE_THRESHOLD,
+    ) -> None:
+        self.app = app
+        self.metrics = metrics
+        self.mode = mode
+        self.threshold = threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        queries = RequestQueries()
+        token = request_queries.set(queries)
+        method = scope['method']
+        started = perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                check_repeated_queries(
+                    queries, method, route_template(scope), self.mode, self.threshold
+                )
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    'Server-Timing', server_timing(queries, perf_counter() - started)
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_queries.reset(token)
+            self.metrics.observed_queries(
+                method, route_template(scope), queries.count, queries.seconds
+            )
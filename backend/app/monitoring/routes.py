@@ -0,0 +1,101 @@
+"""Routes for monitoring."""
+
+from secrets import compare_digest
+from typing import Annotated
+
+from decouple import config
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from auth.dependencies import AsyncHasPermissions, HasPermissions
+from auth.hashing import password_hasher
+from auth.limits import limits_as_dict
+from auth.revocation import revocation_store
+from db import get_pool_statistics
+from monitoring.metrics import request_metrics
+from user.cache import principal_cache
+from user.models import User
+
+# Bearer token scrapers send to /metrics, which refuses every request without one
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+
+def check_metrics_token(
+    authorization: Annotated[(str | None), Header()] = None,
+) -> None:
+    """Lets in requests carrying the METRICS_TOKEN bearer token."""
+    if not METRICS_TOKEN or not compare_digest(
+        authorization or '', f'Bearer {METRICS_TOKEN}'
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail='Not authenticated',
+            headers={'WWW-Authenticate': 'Bearer'},
+        )
+
+
+monitoring_router = APIRouter(
+    prefix='/api/v1/monitoring',
+    tags=['monitoring'],
+)
+
+# Served at the root, where Prometheus scrapes by default
+metrics_router = APIRouter(
+    tags=['monitoring'], dependencies=[Depends(check_metrics_token)]
+)
+
+
+def admin_monitoring_router(async_database: bool) -> APIRouter:
+    """The monitoring routes, restricted to Administrators.
+
+    They are shared by both modes, so the check loads the principal with
+    the session of the mode the app runs in.
+    """
+    permission_class = AsyncHasPermissions if async_database else HasPermissions
+    # Users have no owner, so only administrators pass the owner check
+    user_is_admin = permission_class(
+        object_model=User, valid_roles=['Administrator'], check_owner=True
+    )
+    router = APIRouter(dependencies=[Depends(user_is_admin)])
+    router.include_router(monitoring_router)
+    return router
+
+
+@monitoring_router.get('/pool/')
+def get_pool():
+    """Get connection pool checkout statistics."""
+    return get_pool_statistics()
+
+
+@monitoring_router.get('/principal-cache/')
+def get_principal_cache():
+    """Get principal cache hit and miss counters."""
+    return principal_cache.as_dict()
+
+
+@monitoring_router.get('/hasher/')
+def get_hasher():
+    """Get password hashing queue depth and timing counters."""
+    return password_hasher.as_dict()
+
+
+@monitoring_router.get('/auth-limits/')
+def get_auth_limits():
+    """Get rate limiter and password check admission counters."""
+    return limits_as_dict()
+
+
+@monitoring_router.get('/revocations/')
+def get_revocations():
+    """Get revoked refresh token counts."""
+    return revocation_store.as_dict()
+
+
+@metrics_router.get('/metrics', response_class=PlainTextResponse)
+async def get_metrics():
+    """Get request metrics in the Prometheus text format."""
+    # Async so the threadpool gauges are read on the event loop
+    return PlainTextResponse(
+        request_metrics.render(),
+        media_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -0,0 +1,68 @@
+"""Settings deciding how create_app assembles the app.
+
+Modules keep reading their own options when imported; Settings only holds
+what the factory chooses between, so tests and servers can build apps with
+other values without touching the environment.
+"""
+
+from dataclasses import dataclass
+
+from decouple import Csv, config
+
+DEFAULT_CORS_ORIGINS = (
+    'https://jdiaz.akamaized.net',
+    'https://jdiaz.akamaized.edgesuite.net',
+    'https://69.164.193.198',
+    'https://127.0.0.1:80',
+    'https://127.0.0.1:8000',
+    'http://jdiaz.akamaized.net',
+    'http://jdiaz.akamaized.edgesuite.net',
+    'http://69.164.193.198',
+    'http://127.0.0.1:80',
+    'http://127.0.0.1:8000',
+)
+CORS_ORIGINS = config(
+    'CORS_ORIGINS', default=','.join(DEFAULT_CORS_ORIGINS), cast=Csv(post_process=tuple)
+)
+# Schema written by `python main.py --openapi FILE`, served as it is instead
+# of being generated on the first /openapi.json
+OPENAPI_SCHEMA_FILE = config('OPENAPI_SCHEMA_FILE', default='')
+CREATE_TABLES_ON_STARTUP = config('CREATE_TABLES_ON_STARTUP', default=False, cast=bool)
+# Inserts the default groups, users and items, needs USER_PASSWORD_1 to _9
+SEED_ON_STARTUP = config('SEED_ON_STARTUP', default=False, cast=bool)
+
+
+@dataclass(frozen=True)
+class Settings:
+    title: str = 'Test API with FastAPI'
+    version: str = '1.0.0'
+    async_database: bool = False
+    cors_origins: tuple[str, ...] = DEFAULT_CORS_ORIGINS
+    api_compression: bool = True
+    sql_tracking: bool = True
+    metrics: bool = True
+    dist_directory: str = '../dist'
+    openapi_file: str = ''
+    create_tables: bool = False
+    seed_database: bool = False
+
+    @classmethod
+    def from_env(cls) -> 'Settings':
+        """Settings from the options the modules read from the environment."""
+        from db import ASYNC_DATABASE
+        from monitoring.metrics import METRICS_ENABLED
+        from monitoring.queries import SQL_TRACKING_ENABLED
+        from utils.compression import API_COMPRESSION_ENABLED
+        from utils.static import DIST_DIRECTORY
+
+        return cls(
+            async_database=ASYNC_DATABASE,
+            cors_origins=CORS_ORIGINS,
+            api_compression=API_COMPRESSION_ENABLED,
+            sql_tracking=SQL_TRACKING_ENABLED,
+            metrics=METRICS_ENABLED,
+            dist_directory=DIST_DIRECTORY,
+            openapi_file=OPENAPI_SCHEMA_FILE,
+            create_tables=CREATE_TABLES_ON_STARTUP,
+            seed_database=SEED_ON_STARTUP,
+        )
@@ -0,0 +1,117 @@
+"""Async routes for users."""
+
+from typing import Annotated, Sequence
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from auth.dependencies import AsyncHasPermissions
+from auth.hashing import password_hasher
+from dependencies import ListPaginationDependency, get_async_session
+from user import crud
+from user.dependencies import get_active_user_async
+from user.models import User, UserCreate, UserSafe, UserUpdate
+from user.relationships import UserWithRelationships
+from utils.export import ExportFormat
+
+async_user_router = APIRouter(
+    prefix='/api/v1/users',
+    tags=['users'],
+    responses={404: {'detail': 'Not found'}},
+)
+
+# Users have no owner, so only administrators pass the owner check
+user_is_admin = AsyncHasPermissions(
+    object_model=User, valid_roles=['Administrator'], check_owner=True
+)
+
+
+@async_user_router.get('/', response_model=Sequence[UserWithRelationships])
+async def get_users(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    pagination: Annotated[ListPaginationDependency, Depends()],
+    response: Response,
+    first_name: Annotated[(str | None), Query(max_length=50)] = None,
+):
+    """Get users."""
+    return await session.run_sync(crud.get_users, pagination, response, first_name)
+
+
+@async_user_router.get(
+    '/search/',
+    response_model=Sequence[UserWithRelationships],
+)
+async def search_users(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    pagination: Annotated[ListPaginationDependency, Depends()],
+    q: Annotated[str, Query(min_length=3, max_length=50)],
+):
+    """Search users by first name, last name and username, best match first."""
+    return await session.run_sync(crud.search_users, pagination, q)
+
+
+@async_user_router.post('/', response_model=UserWithRelationships)
+async def create_user(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    new_user: UserCreate,
+):
+    """Create a user."""
+    hashed_password = await password_hasher.hash(new_user.password)
+    return await session.run_sync(crud.create_user, new_user, hashed_password)
+
+
+@async_user_router.get(
+    '/export/',
+    dependencies=[Depends(user_is_admin)],
+    response_class=StreamingResponse,
+)
+async def export_users(
+    export_format: Annotated[ExportFormat, Query(alias='format')] = 'ndjson',
+    updated_since: Annotated[(float | None), Query(ge=0)] = None,
+):
+    """Stream users as NDJSON or CSV, all or those updated since updated_since."""
+    return crud.export_users(export_format, updated_since)
+
+
+@async_user_router.get('/me/', response_model=UserWithRelationships)
+async def get_logged_user(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    current_user: Annotated[UserSafe, Depends(get_active_user_async)],
+):
+    """Get current user."""
+    return await session.run_sync(crud.get_logged_user, current_user.id)
+
+
+@async_user_router.get('/{object_id}/', response_model=UserWithRelationships)
+async def get_user(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    request: Request,
+    response: Response,
+    object_id: int,
+):
+    """Get a single user, or 304 when If-None-Match holds its current ETag."""
+    return await session.run_sync(crud.get_user, request, response, object_id)
+
+
+@async_user_router.put('/{object_id}/', response_model=UserWithRelationships)
+async def update_user(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    object_id: int,
+    new_user: UserUpdate,
+):
+    """Update a single user."""
+    hashed_password = None
+    if new_user.password is not None:
+        hashed_password = await password_hasher.hash(new_user.password)
+    return await session.run_sync(
+        crud.update_user, object_id, new_user, hashed_password
+    )
+
+
+@async_user_router.delete('/{object_id}/')
+async def delete_user(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+    object_id: int,
+):
+    """Deletes a single user."""
+    return await session.run_sync(crud.delete_user, object_id)
@@ -0,0 +1,118 @@
+"""In-process cache of authenticated users."""
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import NamedTuple
+
+from decouple import config
+
+from auth.models import Principal
+from user.models import User, UserSafe
+
+PRINCIPAL_CACHE_TTL = config('PRINCIPAL_CACHE_TTL', default=60, cast=float)
+PRINCIPAL_CACHE_SIZE = config('PRINCIPAL_CACHE_SIZE', default=1024, cast=int)
+
+
+class CachedPrincipal(NamedTuple):
+    """User and permission data of an authenticated user."""
+
+    user: UserSafe
+    principal: Principal
+
+
+def build_cached_principal(user: User) -> CachedPrincipal:
+    """Builds a cache entry from a user with its group loaded."""
+    return CachedPrincipal(
+        user=UserSafe(**user.__dict__),
+        principal=Principal.from_user(user),
+    )
+
+
+class PrincipalCache:
+    """TTL and LRU bounded cache of principals keyed by username.
+
+    Entries live for `ttl` seconds at most, so changes made by other
+    processes are picked up once the entry expires. A ttl of 0 disables
+    the cache.
+    """
+
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, CachedPrincipal]] = OrderedDict()
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, username: str) -> CachedPrincipal | None:
+        """Returns the cached principal or None when missing or expired."""
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[0] < monotonic():
+                if entry is not None:
+                    del self._entries[username]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, username: str, value: CachedPrincipal) -> None:
+        """Stores a principal, evicting the least recently used ones."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[username] = (monotonic() + self.ttl, value)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, username: str) -> None:
+        """Drops the principal of a username."""
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drops the principal of a user id."""
+        self._invalidate_where(lambda value: value.principal.id == user_id)
+
+    def invalidate_group(self, group_id: int) -> None:
+        """Drops the principals of every member of a group."""
+        self._invalidate_where(lambda value: value.principal.group_id == group_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _invalidate_where(self, predicate) -> None:
+        with self._lock:
+            for username in [
+                username
+                for username, (_, value) in self._entries.items()
+                if predicate(value)
+            ]:
+                del self._entries[username]
+
+    def as_dict(self) -> dict[str, int | float]:
+        """Returns hit and miss counters for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+principal_cache = PrincipalCache(ttl=PRINCIPAL_CACHE_TTL, max_size=PRINCIPAL_CACHE_SIZE)
@@ -0,0 +1,188 @@
+"""User route bodies shared by the sync and async user routers.
+
+Each function runs on a sync Session, the async router calls them through
+AsyncSession.run_sync. Passwords are hashed by the routers before calling
+in, as the sync and async hashers block differently.
+"""
+
+from typing import Any
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
+
+from dependencies import ListPaginationDependency
+from group.models import GroupPermission
+from user.cache import principal_cache
+from user.models import User, UserCreate, UserSafe, UserUpdate
+from user.relationships import (
+    user_adapter,
+    users_adapter,
+    user_relationship_options,
+    user_versions,
+    user_versions_statement,
+)
+from utils.etag import (
+    bump_versions,
+    current_etag,
+    etag_matches,
+    make_etag,
+    not_modified,
+)
+from utils.export import ExportFormat, export_response, export_statement
+from utils.models import create_object_slug
+from utils.search import ranked_search, where_contains
+from utils.serialization import model_response
+
+
+def get_users(
+    session: Session,
+    pagination: ListPaginationDependency,
+    response: Response,
+    first_name: str | None,
+) -> Response:
+    try:
+        statement = select(User).options(*user_relationship_options)
+        statement = where_contains(statement, User, 'first_name', first_name)
+        statement = pagination.paginate(statement, User.username, User.id)
+        users = session.exec(statement).all()
+        pagination.set_next_cursor(response, users, 'username')
+        return model_response(users_adapter, users, response)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(
+            status_code=400, detail='Error fetching user list.'
+        ) from error
+
+
+def search_users(
+    session: Session, pagination: ListPaginationDependency, q: str
+) -> Response:
+    try:
+        statement = (
+            ranked_search(User, q)
+            .options(*user_relationship_options)
+            .offset(pagination.offset)
+            .limit(pagination.limit)
+        )
+        users = session.exec(statement).all()
+        return model_response(users_adapter, users)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error searching users.') from error
+
+
+def create_user(
+    session: Session, new_user: UserCreate, hashed_password: str
+) -> Response:
+    try:
+        slug = create_object_slug(new_user)
+        extra_data = {'hashed_password': hashed_password, 'slug': slug}
+        user = User.model_validate(new_user, update=extra_data)
+        session.add(user)
+        bump_versions(session, GroupPermission, [user.group_id])
+        session.commit()
+        session.refresh(user)
+        return model_response(user_adapter, user)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error creating user.') from error
+
+
+def export_users(
+    export_format: ExportFormat, updated_since: float | None
+) -> StreamingResponse:
+    try:
+        statement = export_statement(User, [], updated_since)
+        return export_response(statement, UserSafe, export_format, 'users')
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error exporting users.') from error
+
+
+def get_logged_user(session: Session, user_id: int) -> Response:
+    try:
+        user: User | None = session.get(
+            User, user_id, options=user_relationship_options
+        )
+        if user:
+            return model_response(user_adapter, user)
+        raise HTTPException(status_code=404, detail='User not found.')
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error fetching user.') from error
+
+
+def get_user(
+    session: Session, request: Request, response: Response, object_id: int
+) -> Response:
+    try:
+        # Without If-None-Match the ETag comes from the loaded object
+        if 'if-none-match' in request.headers:
+            etag = current_etag(session, user_versions_statement(object_id))
+            if etag and etag_matches(request, etag):
+                return not_modified(etag)
+        user: User | None = session.get(
+            User, object_id, options=user_relationship_options
+        )
+        if user:
+            response.headers['ETag'] = make_etag(user_versions(user))
+            return model_response(user_adapter, user, response)
+        raise HTTPException(status_code=404, detail='User not found.')
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error fetching user.') from error
+
+
+def update_user(
+    session: Session,
+    object_id: int,
+    new_user: UserUpdate,
+    hashed_password: str | None,
+) -> Response:
+    """Updates a user, hashed_password is set when the update has a password."""
+    try:
+        # Get user
+        user: User | None = session.get(User, object_id)
+        if user:
+            previous_group_id = user.group_id
+            # Update item
+            new_user_data: dict[str, Any] = new_user.model_dump(exclude_unset=True)
+            if hashed_password is not None:
+                new_user_data.update({'hashed_password': hashed_password})
+            user.sqlmodel_update(new_user_data)
+            # Saves user, bumping its version and its groups'
+            session.add(user)
+            bump_versions(session, User, [object_id])
+            bump_versions(session, GroupPermission, [previous_group_id, user.group_id])
+            session.commit()
+            principal_cache.invalidate_user(object_id)
+            session.refresh(user)
+            return model_response(user_adapter, user)
+        raise HTTPException(status_code=404, detail='User not found.')
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error updating user.') from error
+
+
+def delete_user(session: Session, object_id: int) -> dict[str, bool]:
+    try:
+        user = session.get(User, object_id)
+        if user:
+            bump_versions(session, GroupPermission, [user.group_id])
+            session.delete(user)
+            session.commit()
+            principal_cache.invalidate_user(object_id)
+            return {'deleted': True}
+        raise HTTPException(status_code=404, detail='User not found')
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(status_code=400, detail='Error deleting user.') from error
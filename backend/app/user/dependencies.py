@@ -4,32 +4,94 @@ from typing import Annotated
 import jwt
 from jwt.exceptions import InvalidTokenError
 from fastapi import Depends, HTTPException, status
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from auth.models import TokenData
-from auth.utils import ALGORITHM, SECRET_KEY_ACCESS, oauth2_scheme
+from auth.models import Principal, TokenData
+from auth.utils import AUTH_MODE, ALGORITHM, SECRET_KEY_ACCESS, oauth2_scheme
+from dependencies import get_async_session, get_session
+from user.cache import CachedPrincipal, build_cached_principal, principal_cache
 from user.models import User, UserSafe
 
 
-# Route dependable
-def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
-    """Get a single user via JWT."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail='Invalid authentication credentials',
-        headers={'WWW-Authenticate': 'Bearer'},
-    )
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail='Invalid authentication credentials',
+    headers={'WWW-Authenticate': 'Bearer'},
+)
+
+
+def decode_token_data(token: str) -> TokenData:
+    """Decodes an access token into its token data."""
     try:
         payload = jwt.decode(token, SECRET_KEY_ACCESS, algorithms=[ALGORITHM])  # type: ignore
         username: str | None = payload.get('sub')
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        return TokenData(
+            username=username,
+            user_id=payload.get('uid'),
+            group_id=payload.get('gid'),
+            role=payload.get('role'),
+        )
     except InvalidTokenError as error:
         raise credentials_exception from error
-    user: User | None = User.get_user(token_data.username)
-    if user is None:
-        raise credentials_exception
-    return UserSafe(**user.__dict__)
+
+
+def get_claims_principal(token_data: TokenData) -> Principal | None:
+    """Builds a principal from the token claims when claims are trusted."""
+    if AUTH_MODE != 'claims' or token_data.user_id is None:
+        return None
+    return Principal(
+        id=token_data.user_id,
+        username=token_data.username,  # type: ignore
+        group_id=token_data.group_id,
+        group_name=token_data.role,
+    )
+
+
+def load_authenticated_user(session: Session, token_data: TokenData) -> CachedPrincipal:
+    """Get the cached user and principal of the token subject."""
+    username: str = token_data.username  # type: ignore
+    cached = principal_cache.get(username)
+    if cached is None:
+        user: User | None = User.get_user(session, username)
+        if user is None:
+            raise credentials_exception
+        cached = build_cached_principal(user)
+        principal_cache.set(username, cached)
+    return cached
+
+
+async def load_authenticated_user_async(
+    session: AsyncSession, token_data: TokenData
+) -> CachedPrincipal:
+    """Async version of load_authenticated_user."""
+    username: str = token_data.username  # type: ignore
+    cached = principal_cache.get(username)
+    if cached is None:
+        user: User | None = await User.get_user_async(session, username)
+        if user is None:
+            raise credentials_exception
+        cached = build_cached_principal(user)
+        principal_cache.set(username, cached)
+    return cached
+
+
+def check_active_principal(principal: Principal) -> Principal:
+    """Get the principal if disabled attribute is false."""
+    if not principal.disabled:
+        return principal
+    raise HTTPException(status_code=400, detail='Inactive user')
+
+
+# Route dependable
+def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    session: Annotated[Session, Depends(get_session)],
+):
+    """Get a single user via JWT."""
+    return load_authenticated_user(session, decode_token_data(token)).user
 
 
 # Route dependable
@@ -38,3 +100,48 @@ def get_active_user(current_user: Annotated[UserSafe, Depends(get_current_user)]
     if not current_user.disabled:
         return current_user
     raise HTTPException(status_code=400, detail='Inactive user')
+
+
+# Route dependable
+def get_active_principal(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    session: Annotated[Session, Depends(get_session)],
+):
+    """Get the principal of an active user, from the token claims when trusted."""
+    token_data = decode_token_data(token)
+    principal = get_claims_principal(token_data)
+    if principal is None:
+        principal = load_authenticated_user(session, token_data).principal
+    return check_active_principal(principal)
+
+
+# Route dependable
+async def get_current_user_async(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+):
+    """Get a single user via JWT using the async session."""
+    cached = await load_authenticated_user_async(session, decode_token_data(token))
+    return cached.user
+
+
+# Route dependable
+async def get_active_user_async(
+    current_user: Annotated[UserSafe, Depends(get_current_user_async)],
+):
+    """Get a single user if disabled attribute is false using the async session."""
+    return get_active_user(current_user)
+
+
+# Route dependable
+async def get_active_principal_async(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+):
+    """Get the principal of an active user using the async session."""
+    token_data = decode_token_data(token)
+    principal = get_claims_principal(token_data)
+    if principal is None:
+        cached = await load_authenticated_user_async(session, token_data)
+        principal = cached.principal
+    return check_active_principal(principal)
@@ -1,8 +1,9 @@
 from typing import TYPE_CHECKING
+from sqlalchemy.orm import joinedload
 from sqlmodel import Field, Relationship, SQLModel, Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from dependencies import get_session
-from utils.models import SluggifiedModel
+from utils.models import SluggifiedModel, VersionedModel
 
 if TYPE_CHECKING:
     from item.models import Item
@@ -12,12 +13,14 @@ if TYPE_CHECKING:
 class BaseUser(SQLModel):
     """Base user class."""
 
-    username: str = Field(max_length=100)
+    username: str = Field(max_length=100, unique=True, index=True)
     email: str = Field(max_length=200)
     first_name: str | None = Field(default=None)
     last_name: str | None = Field(default=None)
     disabled: bool = Field(default=False)
-    group_id: int | None = Field(default=None, foreign_key='grouppermission.id')
+    group_id: int | None = Field(
+        default=None, foreign_key='grouppermission.id', index=True
+    )
 
     @property
     def get_full_name(self) -> str:
@@ -56,7 +59,7 @@ class UserSafe(SluggifiedModel, BaseUser):
     items: list['Item'] = Relationship(back_populates='owner')
 
 
-class User(SluggifiedModel, BaseUser, table=True):
+class User(SluggifiedModel, VersionedModel, BaseUser, table=True):
     """DB User."""
 
     id: int | None = Field(default=None, primary_key=True)
@@ -65,14 +68,29 @@ class User(SluggifiedModel, BaseUser, table=True):
     items: list['Item'] = Relationship(back_populates='owner')
 
     @classmethod
-    def get_user(cls, username):
-        session: Session = get_session()
-        statement = select(User).where(User.username == username)
+    def get_user(cls, session: Session, username):
+        statement = (
+            select(User)
+            .where(User.username == username)
+            .options(joinedload(User.group))  # type: ignore
+        )
         user: User | None = session.exec(statement).one_or_none()
         if user:
             return user
         return None
 
+    @classmethod
+    async def get_user_async(cls, session: AsyncSession, username):
+        statement = (
+            select(User)
+            .where(User.username == username)
+            .options(joinedload(User.group))  # type: ignore
+        )
+        user: User | None = (await session.exec(statement)).one_or_none()
+        if user:
+            return user
+        return None
+
     def compare_password(self, form_password: str) -> bool:
         """Compares form password with user's password."""
         if self.hashed_password == 'hash_' + form_password:
@@ -1,9 +1,40 @@
-from item.models import Item
-from user.models import UserSafe
-from group.models import GroupPermission
+from pydantic import TypeAdapter
+from sqlalchemy import Select, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from item.models import ItemSummary
+from user.models import User, UserSafe
+from group.models import GroupPermission, GroupSummary
 
 
 class UserWithRelationships(UserSafe):
     id: int
-    group: GroupPermission | None
-    items: list[Item] | None
+    # Summaries, the table models would expose their row versions
+    group: GroupSummary | None
+    items: list[ItemSummary] | None
+
+
+user_adapter = TypeAdapter(UserWithRelationships)
+users_adapter = TypeAdapter(list[UserWithRelationships])
+
+# Loads what UserWithRelationships serializes, one extra query for items
+user_relationship_options = [
+    joinedload(User.group),  # type: ignore
+    selectinload(User.items),  # type: ignore
+]
+
+
+def user_versions_statement(object_id: int) -> Select:
+    """Selects the versions of the rows UserWithRelationships serializes.
+
+    Item writes bump their owner's version, so items need no column here.
+    """
+    return (
+        select(User.version, GroupPermission.version)
+        .outerjoin(GroupPermission, User.group_id == GroupPermission.id)  # type: ignore
+        .where(User.id == object_id)
+    )
+
+
+def user_versions(user: User) -> tuple[int | None, ...]:
+    return (user.version, user.group.version if user.group else None)
@@ -1,13 +1,16 @@
-from typing import Annotated, Any, Sequence
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, col, select
+from typing import Annotated, Sequence
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
 
-from auth.utils import get_password_hash
+from auth.dependencies import HasPermissions
+from auth.hashing import password_hasher
 from dependencies import ListPaginationDependency, get_session
+from user import crud
 from user.dependencies import get_active_user
 from user.models import User, UserCreate, UserSafe, UserUpdate
 from user.relationships import UserWithRelationships
-from utils.models import create_object_slug
+from utils.export import ExportFormat
 
 user_router = APIRouter(
     prefix='/api/v1/users',
@@ -15,30 +18,35 @@ user_router = APIRouter(
     responses={404: {'detail': 'Not found'}},
 )
 
+# Users have no owner, so only administrators pass the owner check
+user_is_admin = HasPermissions(
+    object_model=User, valid_roles=['Administrator'], check_owner=True
+)
+
 
 @user_router.get('/', response_model=Sequence[UserWithRelationships])
 def get_users(
     session: Annotated[Session, Depends(get_session)],
     # current_user: Annotated[UserSafe, Depends(get_active_user)],
     pagination: Annotated[ListPaginationDependency, Depends()],
+    response: Response,
     first_name: Annotated[(str | None), Query(max_length=50)] = None,
 ):
     """Get users."""
-    try:
-        statement = (
-            select(User)
-            .where(col(User.first_name).contains(first_name if first_name else ''))
-            .offset(pagination.offset)
-            .limit(pagination.limit)
-        )
-        users = session.exec(statement).all()
-        return users
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(
-            status_code=400, detail='Error fetching user list.'
-        ) from error
+    return crud.get_users(session, pagination, response, first_name)
+
+
+@user_router.get(
+    '/search/',
+    response_model=Sequence[UserWithRelationships],
+)
+def search_users(
+    session: Annotated[Session, Depends(get_session)],
+    pagination: Annotated[ListPaginationDependency, Depends()],
+    q: Annotated[str, Query(min_length=3, max_length=50)],
+):
+    """Search users by first name, last name and username, best match first."""
+    return crud.search_users(session, pagination, q)
 
 
 @user_router.post('/', response_model=UserWithRelationships)
@@ -48,57 +56,42 @@ def create_user(
     new_user: UserCreate,
 ):
     """Create a user."""
-    try:
-        slug = create_object_slug(new_user)
-        hashed_password = get_password_hash(new_user.password)
-        extra_data = {'hashed_password': hashed_password, 'slug': slug}
-        user = User.model_validate(new_user, update=extra_data)
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-        safe_user = UserSafe.model_validate(user)
-        return safe_user
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(status_code=400, detail='Error creating user.') from error
+    hashed_password = password_hasher.hash_blocking(new_user.password)
+    return crud.create_user(session, new_user, hashed_password)
+
+
+@user_router.get(
+    '/export/',
+    dependencies=[Depends(user_is_admin)],
+    response_class=StreamingResponse,
+)
+def export_users(
+    export_format: Annotated[ExportFormat, Query(alias='format')] = 'ndjson',
+    updated_since: Annotated[(float | None), Query(ge=0)] = None,
+):
+    """Stream users as NDJSON or CSV, all or those updated since updated_since."""
+    return crud.export_users(export_format, updated_since)
 
 
 @user_router.get('/me/', response_model=UserWithRelationships)
-async def get_logged_user(
+def get_logged_user(
     session: Annotated[Session, Depends(get_session)],
     current_user: Annotated[UserSafe, Depends(get_active_user)],
 ):
     """Get current user."""
-    try:
-        user: User | None = session.get(User, current_user.id)
-        if user:
-            safe_user = UserWithRelationships.model_validate(user)
-            return safe_user
-        raise HTTPException(status_code=404, detail='User not found.')
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(status_code=400, detail='Error fetching user.') from error
+    return crud.get_logged_user(session, current_user.id)
 
 
 @user_router.get('/{object_id}/', response_model=UserWithRelationships)
 def get_user(
     session: Annotated[Session, Depends(get_session)],
     # current_user: Annotated[UserSafe, Depends(get_active_user)],
+    request: Request,
+    response: Response,
     object_id: int,
 ):
-    """Get a single user."""
-    try:
-        user: User | None = session.get(User, object_id)
-        if user:
-            safe_user = UserWithRelationships.model_validate(user)
-            return safe_user
-        raise HTTPException(status_code=404, detail='User not found.')
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(status_code=400, detail='Error fetching user.') from error
+    """Get a single user, or 304 when If-None-Match holds its current ETag."""
+    return crud.get_user(session, request, response, object_id)
 
 
 @user_router.put('/{object_id}/', response_model=UserWithRelationships)
@@ -109,28 +102,10 @@ def update_user(
     new_user: UserUpdate,
 ):
     """Update a single user."""
-    try:
-        # Get user
-        user: User | None = session.get(User, object_id)
-        if user:
-            # Update item
-            new_user_data: dict[str, Any] = new_user.model_dump(exclude_unset=True)
-            if 'password' in new_user_data:
-                new_user_data.update(
-                    {'hashed_password': get_password_hash(new_user_data['password'])}
-                )
-            user.sqlmodel_update(new_user_data)
-            # Saves item
-            session.add(user)
-            session.commit()
-            session.refresh(user)
-            safe_user = UserSafe.model_validate(user)
-            return safe_user
-        raise HTTPException(status_code=404, detail='User not found.')
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(status_code=400, detail='Error updating user.') from error
+    hashed_password = None
+    if new_user.password is not None:
+        hashed_password = password_hasher.hash_blocking(new_user.password)
+    return crud.update_user(session, object_id, new_user, hashed_password)
 
 
 @user_router.delete('/{object_id}/')
@@ -140,14 +115,4 @@ def delete_user(
     object_id: int,
 ):
     """Deletes a single user."""
-    try:
-        user = session.get(User, object_id)
-        if user:
-            session.delete(user)
-            session.commit()
-            return {'deleted': True}
-        raise HTTPException(status_code=404, detail='User not found')
-    except HTTPException as error:
-        raise error
-    except Exception as error:
-        raise HTTPException(status_code=400, detail='Error deleting user.') from error
+    return crud.delete_user(session, object_id)
@@ -0,0 +1,343 @@
+"""Content encodings: negotiation, precompressed files and API compression.
+
+gzip is always available; brotli and zstd are used when the optional brotli
+and zstandard packages are installed. Build steps can precompress the SPA
+ahead of time:
+
+    python -m utils.compression ../dist
+
+API responses are compressed on the fly by CompressionMiddleware.
+"""
+
+import argparse
+import gzip
+import os
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Callable, Iterable, Protocol, Sequence
+
+from decouple import Csv, config
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+API_COMPRESSION_ENABLED = config('API_COMPRESSION_ENABLED', default=True, cast=bool)
+API_COMPRESSION_PATHS = config('API_COMPRESSION_PATHS', default='/api/', cast=Csv())
+API_COMPRESSION_MIN_SIZE = config('API_COMPRESSION_MIN_SIZE', default=1024, cast=int)
+API_COMPRESSION_TYPES = config(
+    'API_COMPRESSION_TYPES',
+    default='application/json,application/x-ndjson,text/csv,text/plain',
+    cast=Csv(),
+)
+# gzip level from 1 to 9, brotli quality from 0 to 11, zstd level from 1 to 22
+API_COMPRESSION_LEVEL = config('API_COMPRESSION_LEVEL', default=6, cast=int)
+API_BROTLI_QUALITY = config('API_BROTLI_QUALITY', default=4, cast=int)
+API_ZSTD_LEVEL = config('API_ZSTD_LEVEL', default=3, cast=int)
+
+# Text formats worth compressing, images and fonts are compressed already
+COMPRESSIBLE_SUFFIXES = frozenset(
+    ('.html', '.js', '.mjs', '.css', '.json', '.map', '.svg', '.txt', '.xml', '.wasm')
+)
+# Variants are kept only when they save at least this share of the size
+MIN_SAVING = 0.1
+
+COMPRESSORS: dict[str, Callable[[bytes], bytes]] = {
+    # mtime=0 keeps the output identical between builds
+    'gzip': lambda data: gzip.compress(data, compresslevel=9, mtime=0),
+}
+if brotli is not None:
+    COMPRESSORS['br'] = lambda data: brotli.compress(data, quality=11)
+
+FILE_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+# Preferred first when the client accepts several with the same weight
+ENCODINGS: tuple[str, ...] = tuple(
+    encoding for encoding in ('br', 'gzip') if encoding in COMPRESSORS
+)
+
+
+def accepted_encodings(header: str) -> dict[str, float]:
+    """Weights of the codings listed in an Accept-Encoding header."""
+    encodings = {}
+    for part in header.split(','):
+        name, _, parameters = part.partition(';')
+        weight = 1.0
+        for parameter in parameters.split(';'):
+            key, _, value = parameter.strip().partition('=')
+            if key == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name.strip():
+            encodings[name.strip().lower()] = weight
+    return encodings
+
+
+def negotiate_encoding(header: str | None, available: Sequence[str]) -> str | None:
+    """The available coding the client weighs highest, None for identity.
+
+    Ties go to the coding listed first in available.
+    """
+    if not header or not available:
+        return None
+    accepted = accepted_encodings(header)
+    default = accepted.get('*', 0.0)
+    best, best_weight = None, 0.0
+    for encoding in available:
+        weight = accepted.get(encoding, default)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress_variants(data: bytes) -> dict[str, bytes]:
+    """Every available encoding of data that is worth sending."""
+    variants = {}
+    for encoding in ENCODINGS:
+        compressed = COMPRESSORS[encoding](data)
+        if len(compressed) <= len(data) * (1 - MIN_SAVING):
+            variants[encoding] = compressed
+    return variants
+
+
+def variant_path(path: str | Path, encoding: str) -> Path:
+    return Path(f'{path}{FILE_SUFFIXES[encoding]}')
+
+
+def is_fresh_variant(path: str | Path, encoding: str, source_mtime: int) -> bool:
+    """Whether the encoded copy of path exists and is not older than it."""
+    try:
+        return variant_path(path, encoding).stat().st_mtime_ns >= source_mtime
+    except FileNotFoundError:
+        return False
+
+
+def fresh_variants(path: str | Path, source_mtime: int) -> list[str]:
+    return [
+        encoding
+        for encoding in ENCODINGS
+        if is_fresh_variant(path, encoding, source_mtime)
+    ]
+
+
+def write_atomically(path: Path, data: bytes, mode: int) -> None:
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as temporary:
+        temporary.write(data)
+    # NamedTemporaryFile creates 0600 files, which a server running as
+    # another user than the build could not read
+    os.chmod(temporary.name, mode)
+    os.replace(temporary.name, path)
+
+
+def precompress_directory(directory: str | Path, min_size: int = 512) -> int:
+    """Writes .br and .gz files next to the compressible files of directory.
+
+    Up to date variants are left alone, so running it on every start only
+    costs a stat per file. Returns the number of variants written.
+    """
+    written = 0
+    for path in Path(directory).rglob('*'):
+        if (
+            not path.is_file()
+            or path.suffix not in COMPRESSIBLE_SUFFIXES
+            or path.stat().st_size < min_size
+        ):
+            continue
+        source_mtime = path.stat().st_mtime_ns
+        missing: list[str] = [
+            encoding
+            for encoding in ENCODINGS
+            if not is_fresh_variant(path, encoding, source_mtime)
+        ]
+        if not missing:
+            continue
+        variants = compress_variants(path.read_bytes())
+        mode = path.stat().st_mode & 0o777
+        for encoding in missing:
+            if encoding in variants:
+                write_atomically(variant_path(path, encoding), variants[encoding], mode)
+                written += 1
+    return written
+
+
+class StreamCompressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes:
+        """Emits everything compressed so far without ending the stream."""
+        ...
+
+    def finish(self) -> bytes: ...
+
+
+class GzipStream:
+    def __init__(self, level: int = API_COMPRESSION_LEVEL) -> None:
+        # wbits 31 writes the gzip header and trailer
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+class BrotliStream:
+    def __init__(self, quality: int = API_BROTLI_QUALITY) -> None:
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+
+class ZstdStream:
+    def __init__(self, level: int = API_ZSTD_LEVEL) -> None:
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+STREAM_COMPRESSORS: dict[str, Callable[[], StreamCompressor]] = {'gzip': GzipStream}
+if brotli is not None:
+    STREAM_COMPRESSORS['br'] = BrotliStream
+if zstandard is not None:
+    STREAM_COMPRESSORS['zstd'] = ZstdStream
+STREAM_ENCODINGS: tuple[str, ...] = tuple(
+    encoding for encoding in ('zstd', 'br', 'gzip') if encoding in STREAM_COMPRESSORS
+)
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing API responses as they are sent.
+
+    Complete bodies below min_size are sent as they are. Streamed bodies are
+    compressed chunk by chunk and flushed after each one, so exports reach
+    the client as they are produced instead of being buffered.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: Sequence[str] = API_COMPRESSION_PATHS,
+        min_size: int = API_COMPRESSION_MIN_SIZE,
+        media_types: Sequence[str] = API_COMPRESSION_TYPES,
+        encodings: Sequence[str] = STREAM_ENCODINGS,
+    ) -> None:
+        self.app = app
+        self.paths = tuple(paths)
+        self.min_size = min_size
+        self.media_types = frozenset(media_types)
+        self.encodings = encodings
+
+    def is_compressible(self, message: Message) -> bool:
+        headers = Headers(raw=message['headers'])
+        media_type = headers.get('content-type', '').partition(';')[0].strip()
+        return (
+            message['status'] not in (204, 304)
+            and 'content-encoding' not in headers
+            and media_type in self.media_types
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or not scope['path'].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get('accept-encoding'), self.encodings
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        start: Message | None = None
+        compressor: StreamCompressor | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor
+            if message['type'] == 'http.response.start':
+                if self.is_compressible(message):
+                    # Held until the first body chunk tells the size
+                    start = message
+                else:
+                    await send(message)
+                return
+            if message['type'] != 'http.response.body' or (
+                start is None and compressor is None
+            ):
+                await send(message)
+                return
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if start is not None:
+                response_start, start = start, None
+                if not more_body and len(body) < self.min_size:
+                    await send(response_start)
+                    await send(message)
+                    return
+                compressor = STREAM_COMPRESSORS[encoding]()
+                headers = MutableHeaders(scope=response_start)
+                headers['Content-Encoding'] = encoding
+                headers.add_vary_header('Accept-Encoding')
+                etag = headers.get('etag')
+                if etag and not etag.startswith('W/'):
+                    # The encoded bytes differ, only a weak match still holds
+                    headers['ETag'] = f'W/{etag}'
+                if more_body:
+                    if 'content-length' in headers:
+                        del headers['Content-Length']
+                else:
+                    body = compressor.compress(body) + compressor.finish()
+                    headers['Content-Length'] = str(len(body))
+                    await send(response_start)
+                    await send({'type': 'http.response.body', 'body': body})
+                    return
+                await send(response_start)
+            assert compressor is not None
+            if more_body:
+                chunk = compressor.compress(body) + compressor.flush()
+            else:
+                chunk = compressor.compress(body) + compressor.finish()
+            await send(
+                {'type': 'http.response.body', 'body': chunk, 'more_body': more_body}
+            )
+
+        await self.app(scope, receive, send_compressed)
+
+
+def main(arguments: Iterable[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description='Precompress static files.')
+    parser.add_argument('directories', nargs='+')
+    parser.add_argument('--min-size', type=int, default=512)
+    args = parser.parse_args(arguments)
+    for directory in args.directories:
+        written = precompress_directory(directory, args.min_size)
+        print(f'{directory}: {written} variants written ({", ".join(ENCODINGS)})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Weak ETags built from row versions, for conditional GETs.
+
+A representation's ETag joins the versions of every row it serializes, so
+a write only has to bump the versions of the rows it changes and of the
+parents embedding them.
+"""
+
+from typing import Any, Iterable
+
+from fastapi import Request, Response
+from sqlalchemy import Select, update
+from sqlalchemy.orm import Session
+
+
+def make_etag(versions: Iterable[int | None]) -> str:
+    """Weak ETag of a representation; missing related rows count as 0."""
+    return 'W/"' + '.'.join(str(version or 0) for version in versions) + '"'
+
+
+def current_etag(session: Session, statement: Select) -> str | None:
+    """ETag from a select of versions, None when the row does not exist.
+
+    Async routers call it through AsyncSession.run_sync.
+    """
+    versions = session.execute(statement).first()
+    return make_etag(versions) if versions else None
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of etag against the If-None-Match header."""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    opaque_tag = etag.removeprefix('W/')
+    return any(
+        tag.strip().removeprefix('W/') == opaque_tag for tag in header.split(',')
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={'ETag': etag})
+
+
+def bump_versions(session: Session, model: Any, ids: Iterable[int | None]) -> None:
+    """Bumps the version of the given rows in one UPDATE, without committing.
+
+    Async routers call it through AsyncSession.run_sync.
+    """
+    unique_ids = {object_id for object_id in ids if object_id is not None}
+    if unique_ids:
+        session.execute(
+            update(model)
+            .where(model.id.in_(unique_ids))
+            .values(version=model.version + 1)
+        )
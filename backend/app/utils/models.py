@@ -1,8 +1,11 @@
-from typing import Any
+from time import time
+from typing import Any, Sequence
 from uuid import UUID
 from slugify import slugify
 
-from sqlmodel import Field, SQLModel
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from sqlmodel import Field, SQLModel, select
 
 
 def create_object_slug(instance: SQLModel) -> str:
@@ -20,5 +23,51 @@ def create_object_slug(instance: SQLModel) -> str:
     return slug_value
 
 
+def create_unique_slugs(
+    session: Session, model: Any, instances: Sequence[SQLModel]
+) -> list[str]:
+    """Slugs for a batch of new objects, suffixed with -2, -3... when taken.
+
+    Existing slugs sharing a base are fetched in a single query.
+    """
+    bases = [create_object_slug(instance) for instance in instances]
+    taken: set[str] = set()
+    if bases:
+        # 'base-' <= slug < 'base.' matches 'base-<suffix>' through the slug index
+        conditions = [
+            or_(
+                model.slug == base,
+                and_(model.slug >= f'{base}-', model.slug < f'{base}.'),
+            )
+            for base in set(bases)
+        ]
+        taken.update(
+            session.execute(select(model.slug).where(or_(*conditions))).scalars()
+        )
+    slugs = []
+    for base in bases:
+        slug, suffix = base, 2
+        while slug in taken:
+            slug, suffix = f'{base}-{suffix}', suffix + 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
 class SluggifiedModel(SQLModel):
     slug: str | None = Field(default=None, unique=True, nullable=False)
+
+
+class VersionedModel(SQLModel):
+    """Row version bumped by every write that changes the row's representation.
+
+    updated_at is the epoch time of the last insert or UPDATE of the row,
+    bump_versions included, and 0 for rows older than the column.
+    """
+
+    version: int = Field(default=1, sa_column_kwargs={'server_default': '1'})
+    updated_at: float = Field(
+        default_factory=time,
+        index=True,
+        sa_column_kwargs={'onupdate': time, 'server_default': '0'},
+    )
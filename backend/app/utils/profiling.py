@@ -0,0 +1,29 @@
+"""Helpers to measure what the app runs against the database."""
+
+from sqlalchemy import Engine, event
+
+
+class QueryCounter:
+    """Records the statements executed by the engines inside a with block."""
+
+    def __init__(self, *engines: Engine) -> None:
+        # The same engine twice, when reads go through the writer one
+        self.engines = tuple(dict.fromkeys(engines))
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> 'QueryCounter':
+        self.statements.clear()
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for engine in self.engines:
+            event.remove(engine, 'before_cursor_execute', self._record)
@@ -0,0 +1,86 @@
+"""Query plan checks for the statements the app runs against SQLite."""
+
+import re
+from typing import Any
+
+from sqlalchemy import Engine, event
+
+# 'SCAN item' without an index, as opposed to 'SCAN item USING INDEX ...'
+# or the 'SCAN item_fts VIRTUAL TABLE ...' lookups of the search indexes
+FULL_SCAN = re.compile(r'^SCAN (?P<table>\S+)$')
+
+
+class QueryPlanRegression(AssertionError):
+    """Raised when a recorded statement is planned as a full table scan."""
+
+
+def explain_query_plan(engine: Engine, statement: str, parameters: Any) -> list[str]:
+    """Returns the detail lines of EXPLAIN QUERY PLAN for a statement."""
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+        return [row[3] for row in cursor.fetchall()]
+    finally:
+        connection.close()
+
+
+def find_full_scans(plan: list[str]) -> list[str]:
+    return [line for line in plan if FULL_SCAN.match(line.strip())]
+
+
+class QueryPlanRecorder:
+    """Records every distinct SELECT, UPDATE and DELETE run inside a with block.
+
+    check() then explains each of them and fails on full table scans, except
+    for tables listed in allowed_scans.
+    """
+
+    def __init__(self, *engines: Engine, allowed_scans: tuple[str, ...] = ()) -> None:
+        # The same engine twice, when reads go through the writer one
+        self.engines = tuple(dict.fromkeys(engines))
+        self.allowed_scans = allowed_scans
+        self.statements: dict[str, Any] = {}
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith(
+            ('SELECT', 'UPDATE', 'DELETE')
+        ):
+            return
+        self.statements.setdefault(statement, parameters)
+
+    def __enter__(self) -> 'QueryPlanRecorder':
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for engine in self.engines:
+            event.remove(engine, 'before_cursor_execute', self._record)
+
+    def regressions(self) -> list[tuple[str, list[str]]]:
+        """Returns the statements with a full scan and their plans."""
+        found = []
+        for statement, parameters in self.statements.items():
+            plan = explain_query_plan(self.engines[0], statement, parameters)
+            scans = [
+                line
+                for line in find_full_scans(plan)
+                if FULL_SCAN.match(line.strip()).group('table')  # type: ignore
+                not in self.allowed_scans
+            ]
+            if scans:
+                found.append((statement, plan))
+        return found
+
+    def check(self) -> None:
+        """Raises QueryPlanRegression when any statement scans a full table."""
+        found = self.regressions()
+        if found:
+            details = '\n\n'.join(
+                f'{statement}\n  -> ' + '\n  -> '.join(plan)
+                for statement, plan in found
+            )
+            raise QueryPlanRegression(
+                f'{len(found)} statement(s) use a full table scan:\n\n{details}'
+            )
@@ -0,0 +1,129 @@
+"""SQLite FTS5 shadow indexes for the name filters and search endpoints.
+
+Every indexed table gets an external content `<table>_fts` table using the
+trigram tokenizer, so a quoted term matches any substring like the former
+LIKE '%term%' filters did, but through the index. Triggers keep the index
+in sync with the table.
+"""
+
+from typing import Any
+
+from sqlalchemy import Engine, column, text
+from sqlmodel import col, select
+
+SEARCH_INDEXES: dict[str, tuple[str, ...]] = {
+    'item': ('name', 'description'),
+    'user': ('first_name', 'last_name', 'username'),
+    'grouppermission': ('name',),
+}
+# The trigram tokenizer cannot match terms shorter than this
+MIN_SEARCH_LENGTH = 3
+
+
+def search_table(table: str) -> str:
+    return f'{table}_fts'
+
+
+def search_index_ddl(table: str, columns: tuple[str, ...]) -> list[str]:
+    """Returns the statements creating the index of a table and its triggers."""
+    fts = search_table(table)
+    names = ', '.join(columns)
+    new_values = ', '.join(f'new.{name}' for name in columns)
+    old_values = ', '.join(f'old.{name}' for name in columns)
+    delete_old = (
+        f'INSERT INTO {fts}({fts}, rowid, {names}) '
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    insert_new = f'INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values});'
+    return [
+        (
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5('
+            f"{names}, content='{table}', content_rowid='id', tokenize='trigram')"
+        ),
+        (
+            f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON "{table}" '
+            f'BEGIN {insert_new} END'
+        ),
+        (
+            f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON "{table}" '
+            f'BEGIN {delete_old} END'
+        ),
+        # Only indexed columns trigger a reindex, price or owner updates do not
+        (
+            f'CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} '
+            f'ON "{table}" BEGIN {delete_old} {insert_new} END'
+        ),
+    ]
+
+
+def drop_search_index_ddl(table: str) -> list[str]:
+    fts = search_table(table)
+    return [
+        f'DROP TRIGGER IF EXISTS {fts}_ai',
+        f'DROP TRIGGER IF EXISTS {fts}_ad',
+        f'DROP TRIGGER IF EXISTS {fts}_au',
+        f'DROP TABLE IF EXISTS {fts}',
+    ]
+
+
+def create_search_indexes(engine: Engine) -> None:
+    """Creates the indexes and fills them with the existing rows."""
+    with engine.begin() as connection:
+        for table, columns in SEARCH_INDEXES.items():
+            for statement in search_index_ddl(table, columns):
+                connection.exec_driver_sql(statement)
+            fts = search_table(table)
+            connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def drop_search_indexes(engine: Engine) -> None:
+    with engine.begin() as connection:
+        for table in SEARCH_INDEXES:
+            for statement in drop_search_index_ddl(table):
+                connection.exec_driver_sql(statement)
+
+
+def match_query(term: str, column_name: str | None = None) -> str:
+    """Quotes a term as an FTS5 phrase, optionally scoped to one column."""
+    phrase = '"' + term.replace('"', '""') + '"'
+    return f'{column_name} : {phrase}' if column_name else phrase
+
+
+def matching_ids(table: str, query: str) -> Any:
+    """Returns a select of the row ids matching an FTS5 query."""
+    fts = search_table(table)
+    return (
+        text(f'SELECT rowid FROM {fts} WHERE {fts} MATCH :search_query')
+        .bindparams(search_query=query)
+        .columns(column('rowid'))
+    )
+
+
+def where_contains(statement: Any, model: Any, column_name: str, term: str | None):
+    """Filters the statement to rows whose column contains term.
+
+    Without a term the statement is returned untouched. Terms too short for
+    the trigram index fall back to LIKE.
+    """
+    if not term:
+        return statement
+    if len(term) < MIN_SEARCH_LENGTH:
+        return statement.where(col(getattr(model, column_name)).contains(term))
+    query = match_query(term, column_name)
+    return statement.where(col(model.id).in_(matching_ids(model.__tablename__, query)))
+
+
+def ranked_search(model: Any, term: str) -> Any:
+    """Returns a select of the model rows matching term, best match first."""
+    fts = search_table(model.__tablename__)
+    ranked = (
+        text(f'SELECT rowid, rank FROM {fts} WHERE {fts} MATCH :search_query')
+        .bindparams(search_query=match_query(term))
+        .columns(column('rowid'), column('rank'))
+        .subquery('ranked')
+    )
+    return (
+        select(model)
+        .join(ranked, ranked.c.rowid == model.id)
+        .order_by(ranked.c.rank, model.id)
+    )
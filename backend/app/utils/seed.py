@@ -0,0 +1,273 @@
+"""Bulk seeding of groups, users and items for load testing.
+
+Rows are generated lazily and written with chunked executemany inserts, one
+transaction per chunk. Run from the app directory:
+
+    python -m utils.seed --users 100000 --items 1000000
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from time import perf_counter, time
+from typing import Any, Iterable, Iterator, Sequence
+
+from decouple import config
+from slugify import slugify
+from sqlalchemy import Connection, Engine, Table, func, insert, select
+
+from auth.hashing import HASH_WORKERS, hash_password
+from auth.models import RevokedToken  # noqa: F401, created with the tables
+from db import create_db_and_tables, drop_tables, engine
+from group.models import GroupPermission
+from item.models import Item
+from user.models import User
+from utils.search import create_search_indexes, drop_search_indexes
+
+SEED_CHUNK_SIZE = config('SEED_CHUNK_SIZE', default=5000, cast=int)
+SEED_PASSWORD = config('SEED_PASSWORD', default='password')
+# Bound parameters per slug lookup, below SQLite's variable limit
+SLUG_LOOKUP_SIZE = 5000
+
+DEFAULT_GROUPS = {1: 'Standard', 2: 'Moderator', 3: 'Administrator'}
+ADMINISTRATOR_GROUP_ID = 3
+
+group_table: Table = GroupPermission.__table__  # type: ignore
+user_table: Table = User.__table__  # type: ignore
+item_table: Table = Item.__table__  # type: ignore
+
+
+def chunked(rows: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def max_id(connection: Connection, table: Table) -> int:
+    return connection.execute(select(func.max(table.c.id))).scalar() or 0
+
+
+def taken_slugs(connection: Connection, table: Table, slugs: list[str]) -> set[str]:
+    taken: set[str] = set()
+    for lookup in chunked(slugs, SLUG_LOOKUP_SIZE):
+        taken.update(
+            connection.execute(
+                select(table.c.slug).where(table.c.slug.in_(lookup))
+            ).scalars()
+        )
+    return taken
+
+
+def unique_slugs(connection: Connection, table: Table, slugs: list[str]) -> list[str]:
+    """Returns the slugs of a chunk, suffixing the ones already taken."""
+    taken = taken_slugs(connection, table, slugs)
+    if not taken and len(set(slugs)) == len(slugs):
+        return slugs
+    unique = []
+    for slug in slugs:
+        candidate, suffix = slug, 2
+        while candidate in taken:
+            candidate, suffix = f'{slug}-{suffix}', suffix + 1
+            # Suffixed candidates are rare and were not part of the lookup
+            taken.update(taken_slugs(connection, table, [candidate]))
+        taken.add(candidate)
+        unique.append(candidate)
+    return unique
+
+
+def insert_rows(
+    engine: Engine,
+    table: Table,
+    rows: Iterable[dict[str, Any]],
+    chunk_size: int = SEED_CHUNK_SIZE,
+) -> int:
+    """Inserts rows in chunks, filling missing slugs, and returns the count.
+
+    Core inserts skip the models' default factories, so updated_at is set
+    here, otherwise seeded rows get the server default of 0 and never match
+    an updated_since export.
+    """
+    count = 0
+    for chunk in chunked(rows, chunk_size):
+        with engine.begin() as connection:
+            if 'slug' in table.c:
+                slugs = unique_slugs(connection, table, [row['slug'] for row in chunk])
+                for row, slug in zip(chunk, slugs):
+                    row['slug'] = slug
+            if 'updated_at' in table.c:
+                inserted_at = time()
+                for row in chunk:
+                    row.setdefault('updated_at', inserted_at)
+            connection.execute(insert(table), chunk)
+        count += len(chunk)
+    return count
+
+
+def hash_passwords(passwords: Sequence[str], workers: int) -> list[str]:
+    """Hashes passwords on a process pool, bcrypt being CPU bound."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(passwords) // (workers * 4))
+        return list(executor.map(hash_password, passwords, chunksize=chunksize))
+
+
+def group_rows(start: int, count: int) -> Iterator[dict[str, Any]]:
+    prefix = slugify('Group')
+    for number in range(start, start + count):
+        yield {'id': number, 'name': f'Group #{number}', 'slug': f'{prefix}-{number}'}
+
+
+def user_rows(
+    start: int,
+    count: int,
+    group_ids: Sequence[int],
+    hashed_passwords: Sequence[str],
+) -> Iterator[dict[str, Any]]:
+    """Users numbered from start; user 1 is an Administrator.
+
+    hashed_passwords holds one hash per user, or a single shared one.
+    """
+    for index, number in enumerate(range(start, start + count)):
+        yield {
+            'id': number,
+            'username': f'user_{number}',
+            'hashed_password': hashed_passwords[index % len(hashed_passwords)],
+            'email': f'user_{number}@email.com',
+            'first_name': f'First{number}',
+            'last_name': f'Last{number}',
+            'disabled': False,
+            'group_id': ADMINISTRATOR_GROUP_ID
+            if number == 1
+            else group_ids[number % len(group_ids)],
+            'slug': f'user-{number}',
+        }
+
+
+def item_rows(start: int, count: int, owners: int) -> Iterator[dict[str, Any]]:
+    """Items numbered from start, spread evenly over user ids 1 to owners."""
+    for number in range(start, start + count):
+        yield {
+            'id': number,
+            'name': f'Item #{number}',
+            'description': f'Description #{number}',
+            'price': number % 5000,
+            'tax': 10,
+            'owner_id': number % owners + 1 if owners else None,
+            'slug': f'item-{number}',
+        }
+
+
+def report(label: str, count: int, seconds: float, unit: str = 'rows') -> None:
+    rate = count / seconds if seconds else 0
+    print(f'{label:<8} {count:>10} {unit} in {seconds:8.2f}s {rate:>12,.0f} {unit}/s')
+
+
+def seed(
+    groups: int = 0,
+    users: int = 0,
+    items: int = 0,
+    password: str = SEED_PASSWORD,
+    unique_passwords: bool = False,
+    hash_workers: int = HASH_WORKERS,
+    chunk_size: int = SEED_CHUNK_SIZE,
+    engine: Engine = engine,
+) -> dict[str, int]:
+    """Appends generated rows to the tables and returns the count per table.
+
+    The search index triggers are dropped while inserting and the indexes
+    rebuilt once at the end, which is much faster than row by row.
+    """
+    with engine.connect() as connection:
+        existing_groups = set(connection.execute(select(group_table.c.id)).scalars())
+        first_group = max_id(connection, group_table) + 1
+        first_user = max_id(connection, user_table) + 1
+        first_item = max_id(connection, item_table) + 1
+    counts: dict[str, int] = {}
+    drop_search_indexes(engine)
+    try:
+        started = perf_counter()
+        default_groups = [
+            {'id': group_id, 'name': name, 'slug': slugify(name)}
+            for group_id, name in DEFAULT_GROUPS.items()
+            if group_id not in existing_groups
+        ]
+        first_group = max(first_group, max(DEFAULT_GROUPS) + 1)
+        counts['groups'] = insert_rows(
+            engine, group_table, default_groups, chunk_size
+        ) + insert_rows(
+            engine, group_table, group_rows(first_group, groups), chunk_size
+        )
+        report('groups', counts['groups'], perf_counter() - started)
+
+        started = perf_counter()
+        if unique_passwords:
+            hashed_passwords = hash_passwords(
+                [
+                    f'{password}{number}'
+                    for number in range(first_user, first_user + users)
+                ],
+                hash_workers,
+            )
+        else:
+            hashed_passwords = [hash_password(password)]
+        report('hashing', len(hashed_passwords), perf_counter() - started, 'hashes')
+
+        started = perf_counter()
+        # Users other than the administrator go to Standard and the new groups
+        group_ids = [1, *range(first_group, first_group + groups)]
+        counts['users'] = insert_rows(
+            engine,
+            user_table,
+            user_rows(first_user, users, group_ids, hashed_passwords),
+            chunk_size,
+        )
+        report('users', counts['users'], perf_counter() - started)
+
+        started = perf_counter()
+        owners = first_user + users - 1
+        counts['items'] = insert_rows(
+            engine, item_table, item_rows(first_item, items, owners), chunk_size
+        )
+        report('items', counts['items'], perf_counter() - started)
+    finally:
+        started = perf_counter()
+        create_search_indexes(engine)
+        report('search', sum(counts.values()), perf_counter() - started)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--groups', type=int, default=0, help='groups besides the defaults'
+    )
+    parser.add_argument('--users', type=int, default=0)
+    parser.add_argument('--items', type=int, default=0)
+    parser.add_argument('--password', default=SEED_PASSWORD)
+    parser.add_argument(
+        '--unique-passwords',
+        action='store_true',
+        help='hash <password><id> for every user instead of sharing one hash',
+    )
+    parser.add_argument('--hash-workers', type=int, default=HASH_WORKERS)
+    parser.add_argument('--chunk-size', type=int, default=SEED_CHUNK_SIZE)
+    parser.add_argument(
+        '--reset', action='store_true', help='drop and recreate the tables first'
+    )
+    args = parser.parse_args()
+
+    if args.reset:
+        drop_tables()
+    create_db_and_tables()
+    seed(
+        groups=args.groups,
+        users=args.users,
+        items=args.items,
+        password=args.password,
+        unique_passwords=args.unique_passwords,
+        hash_workers=args.hash_workers,
+        chunk_size=args.chunk_size,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""JSON responses that bypass jsonable_encoder.
+
+FastAPI dumps routes with a response_model straight to bytes through
+pydantic-core, but only while the route's response class is the default
+placeholder. ORJSONResponse is therefore installed as the placeholder's
+class and renders only the routes without a response model.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def model_response(
+    adapter: TypeAdapter, content: Any, response: Response | None = None
+) -> Response:
+    """Validates content once with pydantic-core and dumps it straight to bytes.
+
+    Returning the Response skips FastAPI's own response_model pass, so sync
+    routes serialize on their worker thread rather than on the event loop.
+    Headers set on the injected response are carried over.
+    """
+    body = adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+    json_response = Response(body, media_type='application/json')
+    if response is not None:
+        json_response.headers.raw.extend(response.headers.raw)
+    return json_response
@@ -0,0 +1,144 @@
+"""Cache friendly serving of the built SPA.
+
+Hashed asset names (index-D6J0mOUQ.js) never change content, so they are
+cached for a year as immutable; everything else is revalidated. Files are
+served from their precompressed .br or .gz copy when the client accepts
+it, and the HTML shells are held in memory with an ETag per encoding.
+"""
+
+import hashlib
+import logging
+import os
+import re
+from mimetypes import guess_type
+from pathlib import Path
+
+from decouple import config
+from fastapi import HTTPException, Request, Response
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from utils.compression import (
+    compress_variants,
+    fresh_variants,
+    negotiate_encoding,
+    precompress_directory,
+    variant_path,
+)
+from utils.etag import etag_matches
+
+DIST_DIRECTORY = config('DIST_DIRECTORY', default='../dist')
+# Writes missing .br/.gz copies of dist/ when the app starts
+STATIC_PRECOMPRESS = config('STATIC_PRECOMPRESS', default=True, cast=bool)
+STATIC_MIN_COMPRESS_SIZE = config('STATIC_MIN_COMPRESS_SIZE', default=512, cast=int)
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+# Content hash appended by the bundler, 8 characters as in index-D6J0mOUQ.js.
+# Hyphens are left out so names like font-awesome-webfont.woff2 never pass;
+# the rare hash holding one is revalidated instead of cached for a year.
+HASHED_NAME = re.compile(r'-[A-Za-z0-9_]{8}\.[A-Za-z0-9]+$')
+
+logger = logging.getLogger(__name__)
+
+
+def cache_control(path: str) -> str:
+    if HASHED_NAME.search(os.path.basename(path)):
+        return IMMUTABLE_CACHE_CONTROL
+    return REVALIDATE_CACHE_CONTROL
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles serving the fresh .br/.gz copy a client accepts."""
+
+    def file_response(
+        self,
+        full_path: os.PathLike | str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        headers = {'Cache-Control': cache_control(str(full_path))}
+        variants = fresh_variants(full_path, stat_result.st_mtime_ns)
+        if variants:
+            headers['Vary'] = 'Accept-Encoding'
+        encoding = negotiate_encoding(request_headers.get('accept-encoding'), variants)
+        if encoding:
+            # The ETag comes from the variant, so it differs per encoding
+            path = variant_path(full_path, encoding)
+            headers['Content-Encoding'] = encoding
+            response = FileResponse(
+                path,
+                status_code=status_code,
+                headers=headers,
+                media_type=guess_type(str(full_path))[0] or 'text/plain',
+                stat_result=path.stat(),
+            )
+        else:
+            response = FileResponse(
+                full_path,
+                status_code=status_code,
+                headers=headers,
+                stat_result=stat_result,
+            )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+class HtmlShell:
+    """An HTML page kept in memory with its compressed copies and ETag.
+
+    A page missing from dist/ is answered with a 404 and loaded by the
+    first request after it is built.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.bodies: dict[str | None, bytes] = {}
+        self.digest = ''
+
+    def load(self) -> None:
+        content = Path(self.path).read_bytes()
+        self.digest = hashlib.sha256(content).hexdigest()[:16]
+        self.bodies = {None: content, **compress_variants(content)}
+
+    def response(self, request: Request) -> Response:
+        """The page in the best accepted encoding, or 304 on a matching ETag."""
+        if not self.bodies:
+            try:
+                self.load()
+            except FileNotFoundError as error:
+                raise HTTPException(status_code=404, detail='Not Found') from error
+        encoding = negotiate_encoding(
+            request.headers.get('accept-encoding'),
+            [encoding for encoding in self.bodies if encoding],
+        )
+        headers = {
+            'ETag': f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"',
+            'Cache-Control': REVALIDATE_CACHE_CONTROL,
+            'Vary': 'Accept-Encoding',
+        }
+        if etag_matches(request, headers['ETag']):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return Response(self.bodies[encoding], media_type='text/html', headers=headers)
+
+
+def prepare_static_files(dist_directory: str, shells: list[HtmlShell]) -> None:
+    """Precompresses dist/ when enabled and loads the HTML shells."""
+    if STATIC_PRECOMPRESS:
+        try:
+            precompress_directory(dist_directory, STATIC_MIN_COMPRESS_SIZE)
+        except OSError as error:
+            # A read-only dist/ is served uncompressed rather than failing
+            logger.warning('Could not precompress %s: %s', dist_directory, error)
+    for shell in shells:
+        try:
+            shell.load()
+        except FileNotFoundError:
+            logger.warning('%s not found, it is answered with a 404', shell.path)
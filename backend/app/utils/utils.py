@@ -3,15 +3,18 @@ from typing import Any, Callable
 from decouple import config
 
 from fastapi import Depends
-from sqlmodel import Session
+from slugify import slugify
 
-from auth.utils import get_password_hash
+from auth.hashing import HASH_WORKERS
 from db import engine
-from dependencies import get_session
-from group.models import GroupPermission
-from item.models import Item
-from user.models import User
-from utils.models import create_object_slug
+from utils.seed import (
+    DEFAULT_GROUPS,
+    group_table,
+    hash_passwords,
+    insert_rows,
+    item_table,
+    user_table,
+)
 
 
 # def outer_function(func: Callable, param_a: Any, param_b: Any):
@@ -51,53 +54,57 @@ from utils.models import create_object_slug
 
 def create_items() -> None:
     """Generates and returns a list of items."""
-    session: Session = get_session()
-    item_list: list[Item] = []
-    for item_number in range(1, 50):
-        owner: User | None = session.get(User, randint(1, 9))
-        new_item: Item = Item(
-            name=f'Item #{item_number}',
-            description=f'Description #{item_number}',
-            price=randint(1000, 5000),
-            tax=10,
-            owner_id=owner.id if owner else None,
-        )
-        new_item.slug = create_object_slug(new_item)
-        item_list.append(new_item)
-    session.add_all(item_list)
-    session.commit()
+    insert_rows(
+        engine,
+        item_table,
+        [
+            {
+                'name': f'Item #{item_number}',
+                'description': f'Description #{item_number}',
+                'price': randint(1000, 5000),
+                'tax': 10,
+                'owner_id': randint(1, 9),
+                'slug': slugify(f'Item #{item_number}'),
+            }
+            for item_number in range(1, 50)
+        ],
+    )
 
 
 def create_groups() -> None:
     """Generates and returns a list of groups."""
-    session: Session = get_session()
-    standard: GroupPermission = GroupPermission(id=1, name='Standard')
-    standard.slug = create_object_slug(standard)
-    moderator: GroupPermission = GroupPermission(id=2, name='Moderator')
-    moderator.slug = create_object_slug(moderator)
-    administrator: GroupPermission = GroupPermission(id=3, name='Administrator')
-    administrator.slug = create_object_slug(administrator)
-    session.add_all([standard, moderator, administrator])
-    session.commit()
+    insert_rows(
+        engine,
+        group_table,
+        [
+            {'id': group_id, 'name': name, 'slug': slugify(name)}
+            for group_id, name in DEFAULT_GROUPS.items()
+        ],
+    )
 
 
 def create_users() -> None:
     """Generates and returns a list of users."""
-    session: Session = get_session()
-    user_list: list[User] = []
-    group: GroupPermission | None = session.get(GroupPermission, 1)
-    for user_number in range(1, 10):
-        new_user: User = User(
-            id=user_number,
-            username=f'user_{user_number}',
-            hashed_password=get_password_hash(config(f'USER_PASSWORD_{user_number}')),
-            email=f'user_{user_number}@email.com',
-            first_name=f'First{user_number}',
-            last_name=f'Last{user_number}',
-            disabled=(user_number == 6),
-            group_id=user_number if user_number <= 3 else group.id if group else None,
-        )
-        new_user.slug = create_object_slug(new_user)
-        user_list.append(new_user)
-    session.add_all(user_list)
-    session.commit()
+    user_numbers = range(1, 10)
+    hashed_passwords = hash_passwords(
+        [config(f'USER_PASSWORD_{user_number}') for user_number in user_numbers],
+        HASH_WORKERS,
+    )
+    insert_rows(
+        engine,
+        user_table,
+        [
+            {
+                'id': user_number,
+                'username': f'user_{user_number}',
+                'hashed_password': hashed_password,
+                'email': f'user_{user_number}@email.com',
+                'first_name': f'First{user_number}',
+                'last_name': f'Last{user_number}',
+                'disabled': user_number == 6,
+                'group_id': user_number if user_number <= 3 else 1,
+                'slug': slugify(f'user_{user_number}'),
+            }
+            for user_number, hashed_password in zip(user_numbers, hashed_passwords)
+        ],
+    )
@@ -0,0 +1,179 @@
+"""Measures how long a fresh process takes from start to its first response.
+
+Every run starts from a new interpreter, as a restarted or newly scaled
+worker does:
+
+- import: time to import main in a new process, app construction included
+- first_response: uvicorn started until an authenticated item detail GET
+  answers, so the engine, the principal lookup and the routes are all
+  exercised
+- first_openapi: the first /openapi.json of the started server, generated
+  on demand, or read when the app starts with --precomputed-openapi
+
+Usage (from the backend directory):
+    python benchmarks/cold_start.py --save before.json
+    python benchmarks/cold_start.py --compare before.json
+    python benchmarks/cold_start.py --precomputed-openapi --compare before.json
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import harness
+
+IMPORT_SNIPPET = (
+    'import time; started = time.perf_counter(); import main; '
+    'main.create_app(); print(time.perf_counter() - started)'
+)
+
+
+def free_port() -> int:
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        return listener.getsockname()[1]
+
+
+def get(url: str, headers: dict[str, str]) -> int | None:
+    """Status of a GET, None while the server is not accepting connections."""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as r:
+            r.read()
+            return r.status
+    except urllib.error.HTTPError as error:
+        return error.code
+    except (urllib.error.URLError, ConnectionError):
+        return None
+
+
+def measure_import() -> float:
+    output = subprocess.run(
+        [sys.executable, '-W', 'ignore', '-c', IMPORT_SNIPPET],
+        cwd=harness.APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1]) * 1000
+
+
+def measure_server(headers: dict[str, str], timeout: float) -> tuple[float, float]:
+    """Milliseconds to the first item GET and to the first OpenAPI schema."""
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            '-W',
+            'ignore',
+            '-m',
+            'uvicorn',
+            '--factory',
+            'main:create_app',
+            '--port',
+            str(port),
+            '--log-level',
+            'warning',
+        ],
+        cwd=harness.APP_DIR,
+    )
+    try:
+        while (status := get(f'{base_url}/api/v1/items/1/', headers)) is None:
+            if time.perf_counter() - started > timeout or server.poll() is not None:
+                raise RuntimeError('the server did not answer')
+            time.sleep(0.005)
+        if status != 200:
+            raise RuntimeError(f'first request answered {status}')
+        first_response = time.perf_counter() - started
+        openapi_started = time.perf_counter()
+        if get(f'{base_url}/openapi.json', {}) != 200:
+            raise RuntimeError('the OpenAPI schema was not served')
+        first_openapi = time.perf_counter() - openapi_started
+    finally:
+        server.terminate()
+        server.wait()
+    return first_response * 1000, first_openapi * 1000
+
+
+def median(values: list[float]) -> float:
+    return round(statistics.median(values), 1)
+
+
+def print_results(results: dict, baseline: dict | None) -> None:
+    print(f'\nmedian of {results["settings"]["runs"]} runs (ms)')
+    for name, value in results['timings'].items():
+        line = f'  {name:<16}{value:>9.1f}'
+        before = (baseline or {}).get('timings', {}).get(name)
+        if before:
+            line += f'   before {before:>9.1f}  {(value - before) / before:+7.1%}'
+        print(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--async-database', action='store_true')
+    parser.add_argument('--precomputed-openapi', action='store_true')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--save', type=Path, help='write the results as a baseline')
+    parser.add_argument('--compare', type=Path, help='baseline to compare against')
+    arguments = parser.parse_args()
+
+    harness.prepare_environment(
+        Path(tempfile.mkdtemp()) / 'benchmark.db',
+        ASYNC_DATABASE=str(arguments.async_database),
+    )
+    harness.seed_database(users=10, items=10)
+    headers = harness.auth_headers()
+    if arguments.precomputed_openapi:
+        schema = Path(tempfile.mkdtemp()) / 'openapi.json'
+        subprocess.run(
+            [sys.executable, '-W', 'ignore', 'main.py', '--openapi', str(schema)],
+            cwd=harness.APP_DIR,
+            check=True,
+        )
+        # Inherited by the servers started below
+        os.environ['OPENAPI_SCHEMA_FILE'] = str(schema)
+
+    imports, responses, openapis = [], [], []
+    for _ in range(arguments.runs):
+        imports.append(measure_import())
+        first_response, first_openapi = measure_server(headers, arguments.timeout)
+        responses.append(first_response)
+        openapis.append(first_openapi)
+    results = {
+        'settings': {
+            'runs': arguments.runs,
+            'async_database': arguments.async_database,
+            'precomputed_openapi': arguments.precomputed_openapi,
+        },
+        'timings': {
+            'import': median(imports),
+            'first_response': median(responses),
+            'first_openapi': median(openapis),
+        },
+    }
+    baseline = None
+    if arguments.compare:
+        baseline = json.loads(arguments.compare.read_text())
+        if baseline.get('settings') != results['settings']:
+            print('warning: baseline was recorded with different settings')
+    print_results(results, baseline)
+    if arguments.save:
+        arguments.save.write_text(json.dumps(results, indent=2))
+        print(f'\nsaved baseline to {arguments.save}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,484 @@
+"""Load tests every auth, user, group and item route at several data scales.
+
+Each scale runs in its own process against a freshly seeded database. For
+every route it records p50/p95/p99 latency, throughput, errors and the
+number of SQL statements per request. Results can be saved as a JSON
+baseline and later runs compared against it; the comparison exits with
+status 1 when a route regressed by more than the tolerance. A run where a
+route failed every request exits with status 1 before saving or comparing.
+
+Usage (from the backend directory):
+    python benchmarks/endpoints.py --scales small,medium --save baseline.json
+    python benchmarks/endpoints.py --scales small,medium --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, NamedTuple
+
+import harness
+
+# users, items and extra groups seeded for every scale
+SCALES = {
+    'small': {'users': 100, 'items': 1_000, 'groups': 50},
+    'medium': {'users': 1_000, 'items': 20_000, 'groups': 100},
+    'large': {'users': 10_000, 'items': 200_000, 'groups': 200},
+}
+BULK_BATCH = 5
+
+
+class Scenario(NamedTuple):
+    """One route under load.
+
+    request(n) returns the method, url and httpx options of the nth request.
+    share is the fraction of --requests sent to the route, and capacity caps
+    it for routes that consume rows, such as deletes.
+    """
+
+    route: str
+    request: Callable[[int], tuple[str, str, dict[str, Any]]]
+    share: float = 1.0
+    capacity: int | None = None
+
+
+def updated_since(model: Any, rows: int) -> float:
+    """updated_at of the nth newest row, so an export after it has n rows."""
+    from sqlmodel import Session, select
+
+    from db import get_engine
+
+    with Session(get_engine()) as session:
+        statement = (
+            select(model.updated_at).order_by(model.id.desc()).offset(rows - 1).limit(1)
+        )
+        return session.exec(statement).first() or 0
+
+
+def build_scenarios(scale: dict[str, int]) -> list[Scenario]:
+    """Scenarios in run order, creates before the deletes that use their rows."""
+    from auth.utils import create_refresh_token
+    from item.models import Item
+    from user.models import User
+
+    users, items, groups = scale['users'], scale['items'], scale['groups']
+    # Reads and updates use the lower half of the items, deletes the upper one
+    readable = items // 2
+    # Exports are limited to the rows seeded last
+    items_since, users_since = updated_since(Item, 500), updated_since(User, 500)
+
+    def get(url: str, **options: Any) -> Callable[[int], tuple]:
+        return lambda number: ('GET', url, options)
+
+    return [
+        Scenario(
+            'POST /api/v1/oauth2/token/',
+            lambda number: (
+                'POST',
+                '/api/v1/oauth2/token/',
+                {
+                    'data': {
+                        'username': f'user_{number % users + 1}',
+                        'password': 'benchmark',
+                    }
+                },
+            ),
+            share=0.05,
+        ),
+        Scenario(
+            'POST /api/v1/oauth2/refresh/',
+            lambda number: (
+                'POST',
+                '/api/v1/oauth2/refresh/',
+                # Refresh tokens are rotated, each one can be used once
+                {
+                    'cookies': {
+                        'refreshToken': create_refresh_token(data={'sub': 'user_2'})
+                    }
+                },
+            ),
+        ),
+        Scenario('GET /api/v1/items/', get('/api/v1/items/', params={'limit': 50})),
+        Scenario(
+            'GET /api/v1/items/?name',
+            lambda number: (
+                'GET',
+                '/api/v1/items/',
+                {'params': {'name': f'#{number % 100 + 10}'}},
+            ),
+        ),
+        Scenario(
+            'GET /api/v1/items/search/',
+            lambda number: (
+                'GET',
+                '/api/v1/items/search/',
+                {'params': {'q': f'ription #{number % 100 + 10}'}},
+            ),
+        ),
+        Scenario(
+            'GET /api/v1/items/export/',
+            get('/api/v1/items/export/', params={'updated_since': items_since}),
+            share=0.25,
+        ),
+        Scenario(
+            'GET /api/v1/items/{object_id}/',
+            lambda number: ('GET', f'/api/v1/items/{number % readable + 1}/', {}),
+        ),
+        Scenario(
+            'POST /api/v1/items/',
+            lambda number: (
+                'POST',
+                '/api/v1/items/',
+                {'json': {'name': f'New #{number}'}},
+            ),
+            share=0.5,
+        ),
+        Scenario(
+            'POST /api/v1/items/bulk/',
+            lambda number: (
+                'POST',
+                '/api/v1/items/bulk/',
+                {'json': [{'name': f'Bulk #{number}'} for _ in range(BULK_BATCH)]},
+            ),
+            share=0.5,
+        ),
+        # After the bulk creates, so the export has rows without an owner
+        Scenario(
+            'GET /api/v1/items/export/?format=csv',
+            get(
+                '/api/v1/items/export/',
+                params={'format': 'csv', 'updated_since': items_since},
+            ),
+            share=0.1,
+        ),
+        Scenario(
+            'PUT /api/v1/items/{object_id}/',
+            lambda number: (
+                'PUT',
+                f'/api/v1/items/{number % readable + 1}/',
+                {'json': {'price': number}},
+            ),
+            share=0.5,
+        ),
+        Scenario(
+            'PUT /api/v1/items/bulk/',
+            lambda number: (
+                'PUT',
+                '/api/v1/items/bulk/',
+                {
+                    'json': [
+                        {'id': (number * BULK_BATCH + offset) % readable + 1, 'tax': 12}
+                        for offset in range(BULK_BATCH)
+                    ]
+                },
+            ),
+            share=0.5,
+        ),
+        Scenario(
+            'DELETE /api/v1/items/{object_id}/',
+            lambda number: ('DELETE', f'/api/v1/items/{items - number}/', {}),
+            share=0.25,
+            capacity=(items - readable) // 2,
+        ),
+        Scenario(
+            'DELETE /api/v1/items/bulk/',
+            lambda number: (
+                'DELETE',
+                '/api/v1/items/bulk/',
+                {
+                    'json': [
+                        readable + 1 + number * BULK_BATCH + offset
+                        for offset in range(BULK_BATCH)
+                    ]
+                },
+            ),
+            share=0.25,
+            capacity=(items - readable) // 2 // BULK_BATCH,
+        ),
+        Scenario('GET /api/v1/users/', get('/api/v1/users/', params={'limit': 50})),
+        Scenario(
+            'GET /api/v1/users/search/',
+            lambda number: (
+                'GET',
+                '/api/v1/users/search/',
+                {'params': {'q': f'irst{number % 90 + 10}'}},
+            ),
+        ),
+        Scenario(
+            'GET /api/v1/users/export/',
+            get('/api/v1/users/export/', params={'updated_since': users_since}),
+            share=0.25,
+        ),
+        Scenario('GET /api/v1/users/me/', get('/api/v1/users/me/')),
+        Scenario(
+            'GET /api/v1/users/{object_id}/',
+            lambda number: ('GET', f'/api/v1/users/{number % (users // 2) + 1}/', {}),
+        ),
+        Scenario(
+            'POST /api/v1/users/',
+            lambda number: (
+                'POST',
+                '/api/v1/users/',
+                {
+                    'json': {
+                        'username': f'new_{number}',
+                        'email': f'new_{number}@email.com',
+                        'password': 'benchmark',
+                    }
+                },
+            ),
+            share=0.05,
+        ),
+        Scenario(
+            'PUT /api/v1/users/{object_id}/',
+            lambda number: (
+                'PUT',
+                f'/api/v1/users/{number % (users // 2) + 2}/',
+                {'json': {'last_name': f'Last{number}'}},
+            ),
+            share=0.5,
+        ),
+        Scenario(
+            'DELETE /api/v1/users/{object_id}/',
+            lambda number: ('DELETE', f'/api/v1/users/{users - number}/', {}),
+            share=0.25,
+            capacity=users // 2 - 1,
+        ),
+        Scenario('GET /api/v1/groups/', get('/api/v1/groups/', params={'limit': 50})),
+        Scenario(
+            'GET /api/v1/groups/search/',
+            get('/api/v1/groups/search/', params={'q': 'roup #'}),
+        ),
+        Scenario(
+            'GET /api/v1/groups/export/', get('/api/v1/groups/export/'), share=0.25
+        ),
+        Scenario(
+            'GET /api/v1/groups/{object_id}/',
+            lambda number: ('GET', f'/api/v1/groups/{number % (groups + 3) + 1}/', {}),
+        ),
+        Scenario(
+            'POST /api/v1/groups/',
+            lambda number: (
+                'POST',
+                '/api/v1/groups/',
+                {'json': {'name': f'New group #{number}'}},
+            ),
+            share=0.25,
+        ),
+        Scenario(
+            'PUT /api/v1/groups/{object_id}/',
+            lambda number: (
+                'PUT',
+                f'/api/v1/groups/{number % (groups // 2) + 4}/',
+                {'json': {'name': f'Renamed #{number}'}},
+            ),
+            share=0.25,
+        ),
+        Scenario(
+            'DELETE /api/v1/groups/{object_id}/',
+            lambda number: ('DELETE', f'/api/v1/groups/{groups + 3 - number}/', {}),
+            share=0.25,
+            capacity=groups // 2,
+        ),
+    ]
+
+
+def uncovered_routes(scenarios: list[Scenario]) -> set[str]:
+    """Routes of the benchmarked routers that no scenario requests."""
+    from auth.routes import auth_router
+    from group.routes import group_router
+    from item.routes import item_router
+    from user.routes import user_router
+
+    covered = {scenario.route.split('?')[0] for scenario in scenarios}
+    routes = {
+        f'{method} {route.path}'
+        for router in (auth_router, user_router, group_router, item_router)
+        for route in router.routes
+        for method in getattr(route, 'methods', ())
+    }
+    return routes - covered
+
+
+async def run_scale(arguments: argparse.Namespace, scale: dict[str, int]) -> dict:
+    """Runs every scenario of one scale in the current process."""
+    import httpx
+
+    from main import app
+    from utils.profiling import QueryCounter
+
+    harness.seed_database(**scale)
+    headers = harness.auth_headers()
+    scenarios = build_scenarios(scale)
+    results: dict[str, dict] = {}
+
+    async with httpx.AsyncClient(
+        # Server errors are counted like any other failed request
+        transport=httpx.ASGITransport(app=app, raise_app_exceptions=False),
+        base_url='http://benchmark',
+    ) as client:
+        # Warms the principal cache so the first scenario is not penalized
+        await client.get('/api/v1/users/me/', headers=headers)
+        for scenario in scenarios:
+            total = max(1, int(arguments.requests * scenario.share))
+            if scenario.capacity is not None:
+                total = max(1, min(total, scenario.capacity))
+            errors = 0
+
+            async def request(number: int, scenario: Scenario = scenario) -> None:
+                nonlocal errors
+                method, url, options = scenario.request(number)
+                response = await client.request(method, url, headers=headers, **options)
+                if response.status_code >= 400:
+                    errors += 1
+
+            with QueryCounter(*harness.counted_engines()) as counter:
+                latencies, elapsed = await harness.run_load(
+                    request, total, arguments.concurrency
+                )
+            results[scenario.route] = {
+                **harness.summarize(latencies, elapsed),
+                'errors': errors,
+                'queries_per_request': round(counter.count / total, 2),
+            }
+    return {'uncovered': sorted(uncovered_routes(scenarios)), 'routes': results}
+
+
+def compare(
+    results: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    """Returns a line for every route slower, heavier or failing more than before."""
+    regressions = []
+    for scale, routes in results['scales'].items():
+        for route, current in routes['routes'].items():
+            previous = (
+                baseline.get('scales', {}).get(scale, {}).get('routes', {}).get(route)
+            )
+            if not previous:
+                continue
+            checks = [
+                ('p95_ms', current['p95_ms'] > previous['p95_ms'] * (1 + tolerance)),
+                (
+                    'throughput_rps',
+                    current['throughput_rps']
+                    < previous['throughput_rps'] * (1 - tolerance),
+                ),
+                (
+                    'queries_per_request',
+                    current['queries_per_request'] > previous['queries_per_request'],
+                ),
+                ('errors', current['errors'] > previous['errors']),
+            ]
+            regressions.extend(
+                f'{scale:<7} {route:<36} {metric}: '
+                f'{previous[metric]} -> {current[metric]}'
+                for metric, regressed in checks
+                if regressed
+            )
+    return regressions
+
+
+def failing_routes(results: dict[str, Any]) -> list[str]:
+    """Returns a line for every route whose requests all failed.
+
+    Their latencies are those of an error response, so they must not be saved
+    or compared as a baseline.
+    """
+    return [
+        f'{scale:<7} {route:<36} {result["errors"]}/{result["requests"]} errors'
+        for scale, routes in results['scales'].items()
+        for route, result in routes['routes'].items()
+        if result['errors'] >= result['requests']
+    ]
+
+
+def print_results(results: dict[str, Any]) -> None:
+    columns = (
+        'p50_ms',
+        'p95_ms',
+        'p99_ms',
+        'throughput_rps',
+        'queries_per_request',
+        'errors',
+    )
+    for scale, scale_results in results['scales'].items():
+        print(f'\n{scale} {SCALES[scale]}')
+        print(f'{"route":<40}' + ''.join(f'{column:>20}' for column in columns))
+        for route, result in scale_results['routes'].items():
+            print(
+                f'{route:<40}' + ''.join(f'{result[column]:>20}' for column in columns)
+            )
+        for route in scale_results['uncovered']:
+            print(f'not benchmarked: {route}')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default='small,medium')
+    parser.add_argument('--requests', type=int, default=200, help='per route')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--async-database', action='store_true')
+    parser.add_argument('--save', type=Path, help='write the results as a baseline')
+    parser.add_argument('--compare', type=Path, help='baseline to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--scale', choices=SCALES, help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.scale:
+        harness.prepare_environment(
+            Path(tempfile.mkdtemp()) / 'benchmark.db',
+            ASYNC_DATABASE=str(arguments.async_database),
+        )
+        result = asyncio.run(run_scale(arguments, SCALES[arguments.scale]))
+        print(json.dumps(result))
+        return 0
+
+    settings = {
+        'requests': arguments.requests,
+        'concurrency': arguments.concurrency,
+        'async_database': arguments.async_database,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+    }
+    results: dict[str, Any] = {'settings': settings, 'scales': {}}
+    for scale in arguments.scales.split(','):
+        if scale not in SCALES:
+            parser.error(f'unknown scale {scale!r}, choose from {", ".join(SCALES)}')
+        output = subprocess.run(
+            [sys.executable, __file__, *sys.argv[1:], '--scale', scale],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results['scales'][scale] = json.loads(output.strip().splitlines()[-1])
+    print_results(results)
+    failing = failing_routes(results)
+    if failing:
+        print(f'\n{len(failing)} route(s) failed every request, nothing saved:')
+        print('\n'.join(failing))
+        return 1
+
+    if arguments.save:
+        arguments.save.write_text(json.dumps(results, indent=2))
+        print(f'\nsaved baseline to {arguments.save}')
+    if arguments.compare:
+        baseline = json.loads(arguments.compare.read_text())
+        if baseline.get('settings', {}).get('requests') != settings['requests']:
+            print('\nwarning: baseline was recorded with different settings')
+        regressions = compare(results, baseline, arguments.tolerance)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) against {arguments.compare}:')
+            print('\n'.join(regressions))
+            return 1
+        print(f'\nno regressions against {arguments.compare}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Shared helpers for the benchmark scripts.
+
+The app modules read their settings at import time, so every benchmark
+calls prepare_environment() before importing anything from the app.
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+APP_DIR = Path(__file__).resolve().parents[1] / 'app'
+
+BENCHMARK_ENVIRONMENT = {
+    'ALGORITHM': 'HS256',
+    'SECRET_KEY_ACCESS': 'benchmark-access-secret',
+    'SECRET_KEY_REFRESH': 'benchmark-refresh-secret',
+    # Every request comes from the one test client, which the login limits
+    # would soon turn away
+    'AUTH_RATE_LIMIT_ENABLED': 'False',
+}
+
+
+def prepare_environment(database: Path, **overrides: str) -> None:
+    """Points the app at the given database and makes its modules importable."""
+    for key, value in BENCHMARK_ENVIRONMENT.items():
+        os.environ.setdefault(key, value)
+    os.environ['SQL_FILE_NAME'] = str(database)
+    os.environ.update(overrides)
+    if str(APP_DIR) not in sys.path:
+        sys.path.insert(0, str(APP_DIR))
+    # main.py resolves the SPA files relative to the app directory
+    os.chdir(APP_DIR)
+
+
+def seed_database(users: int, items: int, groups: int = 0) -> None:
+    """Creates the tables and inserts groups, users and items.
+
+    user_1 is an Administrator, the other users are spread over Standard and
+    the extra groups, and item n belongs to user n % users + 1.
+    """
+    from db import create_db_and_tables
+    from utils.seed import seed
+
+    create_db_and_tables()
+    # Hashing is not what is measured, every user shares one password
+    seed(groups=groups, users=users, items=items, password='benchmark')
+
+
+def counted_engines() -> list:
+    """Returns the engines statements run on, writers and readers, sync and async."""
+    from db import get_async_engine, get_async_read_engine, get_engine, get_read_engine
+
+    return [
+        get_engine(),
+        get_read_engine(),
+        get_async_engine().sync_engine,
+        get_async_read_engine().sync_engine,
+    ]
+
+
+def auth_headers(username: str = 'user_1') -> dict[str, str]:
+    """Returns an Authorization header with a fresh access token."""
+    from auth.utils import create_access_token
+
+    token = create_access_token(data={'sub': username})
+    return {'Authorization': f'Bearer {token}'}
+
+
+async def run_load(
+    request: Callable[[int], Awaitable[Any]],
+    total: int,
+    concurrency: int,
+) -> tuple[list[float], float]:
+    """Runs request(n) total times with bounded concurrency.
+
+    Returns the latency of every request in seconds and the wall time.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def timed(number: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await request(number)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(number) for number in range(total)))
+    return latencies, time.perf_counter() - started
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict[str, float]:
+    """Returns percentiles in milliseconds and throughput in requests/sec."""
+    ordered = sorted(latencies)
+    quantiles = statistics.quantiles(ordered, n=100, method='inclusive')
+    return {
+        'requests': len(ordered),
+        'p50_ms': round(quantiles[49] * 1000, 3),
+        'p95_ms': round(quantiles[94] * 1000, 3),
+        'p99_ms': round(quantiles[98] * 1000, 3),
+        'throughput_rps': round(len(ordered) / elapsed, 1),
+    }
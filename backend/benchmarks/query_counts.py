@@ -0,0 +1,71 @@
+"""Checks that list and detail endpoints run a fixed number of queries.
+
+Every endpoint is requested with the smallest and the largest page size.
+The query count must match EXPECTED_QUERIES for both, so an N+1 loading
+pattern shows up as a failure. Exits with status 1 on any mismatch.
+
+Usage (from the backend directory):
+    python benchmarks/query_counts.py [--async-database]
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import harness
+
+# Statements per request once the principal of the caller is cached
+EXPECTED_QUERIES = {
+    '/api/v1/items/': 1,
+    '/api/v1/items/1/': 1,
+    '/api/v1/users/': 2,
+    '/api/v1/users/1/': 2,
+    '/api/v1/users/me/': 2,
+    '/api/v1/groups/': 2,
+    '/api/v1/groups/1/': 2,
+}
+PAGE_SIZES = (10, 100)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--async-database', action='store_true')
+    arguments = parser.parse_args()
+
+    harness.prepare_environment(
+        Path(tempfile.mkdtemp()) / 'benchmark.db',
+        ASYNC_DATABASE=str(arguments.async_database),
+    )
+    from fastapi.testclient import TestClient
+
+    from main import app
+    from utils.profiling import QueryCounter
+
+    harness.seed_database(users=200, items=400)
+    client = TestClient(app)
+    headers = harness.auth_headers()
+    # Warms the principal cache, authentication is not what is counted here
+    client.get('/api/v1/users/me/', headers=headers)
+
+    failures = 0
+    for path, expected in EXPECTED_QUERIES.items():
+        counts = []
+        for limit in PAGE_SIZES:
+            with QueryCounter(*harness.counted_engines()) as counter:
+                response = client.get(path, params={'limit': limit}, headers=headers)
+            if response.status_code != 200:
+                print(f'{path}: status {response.status_code}')
+                failures += 1
+            counts.append(counter.count)
+        passed = all(count == expected for count in counts)
+        failures += not passed
+        print(
+            f'{"ok" if passed else "FAIL":<5}{path:<24}'
+            f'expected {expected}, got {counts} for page sizes {PAGE_SIZES}'
+        )
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Fails when a query the routers or dependencies run becomes a full scan.
+
+Drives every user, group, item and auth route against a seeded database,
+records the statements they run and checks their EXPLAIN QUERY PLAN with
+utils.query_plan. Exits with status 1 and prints the plans on regressions.
+
+Usage (from the backend directory):
+    python benchmarks/query_plans.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import harness
+
+
+def main() -> int:
+    harness.prepare_environment(Path(tempfile.mkdtemp()) / 'benchmark.db')
+    from fastapi.testclient import TestClient
+
+    from db import engine, get_read_engine
+    from main import app
+    from user.cache import principal_cache
+    from utils.query_plan import QueryPlanRecorder, QueryPlanRegression
+
+    harness.seed_database(users=200, items=2000)
+    client = TestClient(app)
+    headers = harness.auth_headers('user_2')
+    # Lists run in keyset mode, offset pages walk the table in id order
+    requests = [
+        ('get', '/api/v1/items/', {'params': {'limit': 50, 'cursor': ''}}),
+        ('get', '/api/v1/items/', {'params': {'name': 'em #12', 'cursor': ''}}),
+        ('get', '/api/v1/items/', {'params': {'name': '#1', 'cursor': ''}}),
+        ('get', '/api/v1/items/search/', {'params': {'q': 'ription #4'}}),
+        ('get', '/api/v1/items/1/', {}),
+        ('put', '/api/v1/items/1/', {'json': {'price': 10}}),
+        ('post', '/api/v1/items/bulk/', {'json': [{'name': 'Item #1'}]}),
+        ('put', '/api/v1/items/bulk/', {'json': [{'id': 1, 'price': 11}]}),
+        ('delete', '/api/v1/items/bulk/', {'json': [401]}),
+        ('delete', '/api/v1/items/201/', {}),
+        ('get', '/api/v1/items/export/', {'params': {'updated_since': 1}}),
+        ('get', '/api/v1/users/', {'params': {'limit': 50, 'cursor': ''}}),
+        ('get', '/api/v1/users/', {'params': {'first_name': 'irst12', 'cursor': ''}}),
+        ('get', '/api/v1/users/search/', {'params': {'q': 'user_1'}}),
+        ('get', '/api/v1/users/me/', {}),
+        ('get', '/api/v1/users/3/', {}),
+        ('get', '/api/v1/groups/', {'params': {'cursor': ''}}),
+        ('get', '/api/v1/groups/search/', {'params': {'q': 'admin'}}),
+        ('get', '/api/v1/groups/1/', {}),
+        ('put', '/api/v1/groups/2/', {'json': {'name': 'Moderators'}}),
+    ]
+
+    with QueryPlanRecorder(engine, get_read_engine()) as recorder:
+        for method, path, options in requests:
+            principal_cache.clear()
+            response = client.request(method, path, headers=headers, **options)
+            if response.status_code >= 400:
+                print(f'{method.upper()} {path}: status {response.status_code}')
+                return 1
+        cursor = client.get(
+            '/api/v1/items/', headers=headers, params={'cursor': ''}
+        ).headers
+        client.get(
+            '/api/v1/items/',
+            params={'cursor': cursor['x-next-cursor']},
+            headers=headers,
+        )
+        # Login runs the User.get_user lookup of authenticate_user
+        client.post(
+            '/api/v1/oauth2/token/',
+            data={'username': 'user_2', 'password': 'benchmark'},
+        )
+
+    try:
+        recorder.check()
+    except QueryPlanRegression as error:
+        print(error)
+        return 1
+    print(f'ok   {len(recorder.statements)} statements use indexes')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
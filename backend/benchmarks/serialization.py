@@ -0,0 +1,157 @@
+"""Measures the CPU spent serializing 100-row list pages.
+
+End to end, every list endpoint is requested with limit=100 and the process
+CPU time per request is reported. The test client runs in the same process,
+so its share is included, but it is the same for every run.
+
+The serializer section turns the same loaded rows into JSON bytes the ways
+a route can:
+
+- jsonable_encoder: validate, jsonable_encoder, json.dumps, the path of a
+  hand built JSONResponse or of a route with an explicit response class
+- orjson: validate, dump to Python objects, orjson.dumps
+- dump_json: validate and dump straight to bytes with pydantic-core
+
+Usage (from the backend directory):
+    python benchmarks/serialization.py --save before.json
+    python benchmarks/serialization.py --compare before.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import harness
+
+PAGE_SIZE = 100
+LIST_ENDPOINTS = ('/api/v1/items/', '/api/v1/users/', '/api/v1/groups/')
+
+
+def cpu_ms_per_call(function: Callable[[], Any], calls: int) -> float:
+    """Median process CPU time of function in milliseconds, over 5 rounds."""
+    rounds = []
+    for _ in range(5):
+        started = time.process_time()
+        for _ in range(calls):
+            function()
+        rounds.append((time.process_time() - started) / calls * 1000)
+    return round(statistics.median(rounds), 3)
+
+
+def measure_endpoints(requests: int) -> dict[str, float]:
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    client = TestClient(app)
+    headers = harness.auth_headers()
+    results = {}
+    for path in LIST_ENDPOINTS:
+
+        def request(path: str = path) -> None:
+            response = client.get(path, params={'limit': PAGE_SIZE}, headers=headers)
+            assert response.status_code == 200, response.text
+            assert len(response.json()) == PAGE_SIZE
+
+        request()
+        results[path] = cpu_ms_per_call(request, requests // 5)
+    return results
+
+
+def measure_serializers(calls: int) -> dict[str, float]:
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from sqlmodel import Session, select
+
+    from db import engine
+    from group.models import GroupPermission
+    from group.relationships import GroupWithRelationships, group_relationship_options
+    from item.models import Item
+    from item.relationships import ItemWithRelationships, item_relationship_options
+    from user.models import User
+    from user.relationships import UserWithRelationships, user_relationship_options
+
+    pages = {
+        'items': (Item, item_relationship_options, ItemWithRelationships),
+        'users': (User, user_relationship_options, UserWithRelationships),
+        'groups': (GroupPermission, group_relationship_options, GroupWithRelationships),
+    }
+    results = {}
+    with Session(engine) as session:
+        for name, (model, options, schema) in pages.items():
+            rows = session.exec(
+                select(model).options(*options).order_by(model.id).limit(PAGE_SIZE)
+            ).all()
+            adapter = TypeAdapter(list[schema])  # type: ignore
+
+            def validate(rows: Any = rows, adapter: TypeAdapter = adapter) -> Any:
+                return adapter.validate_python(rows, from_attributes=True)
+
+            serializers = {
+                'jsonable_encoder': lambda: json.dumps(
+                    jsonable_encoder(validate())
+                ).encode(),
+                'orjson': lambda adapter=adapter: orjson.dumps(
+                    adapter.dump_python(validate(), mode='json')
+                ),
+                'dump_json': lambda adapter=adapter: adapter.dump_json(validate()),
+            }
+            for serializer, function in serializers.items():
+                results[f'{name} {serializer}'] = cpu_ms_per_call(function, calls)
+    return results
+
+
+def print_results(results: dict[str, Any], baseline: dict[str, Any] | None) -> None:
+    for section in ('endpoints', 'serializers'):
+        print(f'\n{section} (CPU ms per {PAGE_SIZE}-row page)')
+        for name, value in results[section].items():
+            line = f'  {name:<28}{value:>9.3f}'
+            before = (baseline or {}).get(section, {}).get(name)
+            if before:
+                line += f'   before {before:>9.3f}  {(value - before) / before:+7.1%}'
+            print(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--calls', type=int, default=40)
+    parser.add_argument('--async-database', action='store_true')
+    parser.add_argument('--save', type=Path, help='write the results as a baseline')
+    parser.add_argument('--compare', type=Path, help='baseline to compare against')
+    arguments = parser.parse_args()
+
+    harness.prepare_environment(
+        Path(tempfile.mkdtemp()) / 'benchmark.db',
+        ASYNC_DATABASE=str(arguments.async_database),
+    )
+    # Enough groups and users for full pages of every list
+    harness.seed_database(users=400, items=1000, groups=120)
+    results = {
+        'settings': {
+            'requests': arguments.requests,
+            'async_database': arguments.async_database,
+        },
+        'endpoints': measure_endpoints(arguments.requests),
+        'serializers': measure_serializers(arguments.calls),
+    }
+    baseline = None
+    if arguments.compare:
+        baseline = json.loads(arguments.compare.read_text())
+        if baseline.get('settings') != results['settings']:
+            print('warning: baseline was recorded with different settings')
+    print_results(results, baseline)
+    if arguments.save:
+        arguments.save.write_text(json.dumps(results, indent=2))
+        print(f'\nsaved baseline to {arguments.save}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Compares item endpoint throughput under the SQLite storage profiles.
+
+Every profile runs in its own process against a fresh database, because
+the profile is read when db.py is imported.
+
+Usage (from the backend directory):
+    python benchmarks/sqlite_profile.py --items 20000 --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import harness
+
+PROFILES = ('default', 'tuned')
+
+
+async def run_profile(arguments: argparse.Namespace) -> dict:
+    """Runs the mixed read/write workload in the current process."""
+    import httpx
+
+    from main import app
+
+    harness.seed_database(users=arguments.users, items=arguments.items)
+    headers = harness.auth_headers()
+    errors = 0
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url='http://benchmark'
+    ) as client:
+
+        async def request(number: int) -> None:
+            nonlocal errors
+            object_id = number % arguments.items + 1
+            # 10 percent writes, the rest are list and detail reads
+            if number % 10 == 0:
+                response = await client.put(
+                    f'/api/v1/items/{object_id}/',
+                    json={'price': number},
+                    headers=headers,
+                )
+            elif number % 10 < 6:
+                response = await client.get(
+                    '/api/v1/items/',
+                    params={'limit': 50, 'offset': number % 1000},
+                    headers=headers,
+                )
+            else:
+                response = await client.get(
+                    f'/api/v1/items/{object_id}/', headers=headers
+                )
+            if response.status_code != 200:
+                errors += 1
+
+        latencies, elapsed = await harness.run_load(
+            request, arguments.requests, arguments.concurrency
+        )
+    return {**harness.summarize(latencies, elapsed), 'errors': errors}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--async-database', action='store_true')
+    parser.add_argument('--profile', choices=PROFILES, help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.profile:
+        database = Path(tempfile.mkdtemp()) / 'benchmark.db'
+        harness.prepare_environment(
+            database,
+            SQLITE_PROFILE=arguments.profile,
+            ASYNC_DATABASE=str(arguments.async_database),
+        )
+        print(json.dumps(asyncio.run(run_profile(arguments))))
+        return
+
+    results = {}
+    for profile in PROFILES:
+        output = subprocess.run(
+            [sys.executable, __file__, *sys.argv[1:], '--profile', profile],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results[profile] = json.loads(output.strip().splitlines()[-1])
+
+    print(f'{"profile":<10}' + ''.join(f'{key:>16}' for key in results['tuned']))
+    for profile, result in results.items():
+        print(f'{profile:<10}' + ''.join(f'{value:>16}' for value in result.values()))
+
+
+if __name__ == '__main__':
+    main()
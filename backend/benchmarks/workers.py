@@ -0,0 +1,136 @@
+"""Measures throughput over HTTP with gunicorn at several worker counts.
+
+Every worker count starts gunicorn with app/gunicorn.conf.py on a free
+port, waits for it to answer and sends authenticated item list GETs from
+--concurrency clients. Workers only add throughput with CPUs to run them,
+so compare counts up to the cores of the machine.
+
+Usage (from the backend directory):
+    python benchmarks/workers.py --workers 1,2,4 --save before.json
+    python benchmarks/workers.py --workers 1,2,4 --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import harness
+from cold_start import free_port, get
+
+URL = '/api/v1/items/?limit=50'
+
+
+def start_server(workers: int, port: int, timeout: float) -> subprocess.Popen:
+    server = subprocess.Popen(
+        ['gunicorn', '--config', 'app/gunicorn.conf.py', 'main:create_app()'],
+        cwd=harness.APP_DIR.parent,
+        env={
+            **os.environ,
+            'WEB_BIND': f'127.0.0.1:{port}',
+            'WEB_WORKERS': str(workers),
+            'WEB_LOG_LEVEL': 'warning',
+        },
+    )
+    started = time.perf_counter()
+    while get(f'http://127.0.0.1:{port}/api/v1/monitoring/hasher/', {}) is None:
+        if time.perf_counter() - started > timeout or server.poll() is not None:
+            server.terminate()
+            raise RuntimeError('gunicorn did not answer')
+        time.sleep(0.05)
+    return server
+
+
+async def measure(
+    port: int, headers: dict[str, str], total: int, concurrency: int
+) -> dict[str, float]:
+    import httpx
+
+    async with httpx.AsyncClient(
+        base_url=f'http://127.0.0.1:{port}',
+        headers=headers,
+        limits=httpx.Limits(max_connections=concurrency),
+    ) as client:
+
+        async def request(number: int) -> None:
+            response = await client.get(URL)
+            if response.status_code != 200:
+                raise RuntimeError(f'{URL} answered {response.status_code}')
+
+        # Warms every worker up before timing
+        await harness.run_load(request, concurrency * 4, concurrency)
+        latencies, elapsed = await harness.run_load(request, total, concurrency)
+    return harness.summarize(latencies, elapsed)
+
+
+def print_results(results: dict, baseline: dict | None) -> None:
+    print(f'\n{"workers":<9}{"p50_ms":>9}{"p95_ms":>9}{"p99_ms":>9}{"rps":>9}')
+    for workers, summary in results['workers'].items():
+        line = (
+            f'{workers:<9}{summary["p50_ms"]:>9.2f}{summary["p95_ms"]:>9.2f}'
+            f'{summary["p99_ms"]:>9.2f}{summary["throughput_rps"]:>9.1f}'
+        )
+        before = (baseline or {}).get('workers', {}).get(workers)
+        if before:
+            change = summary['throughput_rps'] / before['throughput_rps'] - 1
+            line += f'   before {before["throughput_rps"]:>7.1f} rps  {change:+7.1%}'
+        print(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', default='1,2', help='comma separated counts')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--async-database', action='store_true')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--save', type=Path, help='write the results as a baseline')
+    parser.add_argument('--compare', type=Path, help='baseline to compare against')
+    arguments = parser.parse_args()
+
+    harness.prepare_environment(
+        Path(tempfile.mkdtemp()) / 'benchmark.db',
+        ASYNC_DATABASE=str(arguments.async_database),
+    )
+    harness.seed_database(users=100, items=1_000)
+    headers = harness.auth_headers()
+
+    results: dict = {
+        'settings': {
+            'requests': arguments.requests,
+            'concurrency': arguments.concurrency,
+            'async_database': arguments.async_database,
+            'cpus': os.cpu_count(),
+        },
+        'workers': {},
+    }
+    for workers in arguments.workers.split(','):
+        port = free_port()
+        server = start_server(int(workers), port, arguments.timeout)
+        try:
+            results['workers'][workers] = asyncio.run(
+                measure(port, headers, arguments.requests, arguments.concurrency)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+    baseline = None
+    if arguments.compare:
+        baseline = json.loads(arguments.compare.read_text())
+        if baseline.get('settings') != results['settings']:
+            print('warning: baseline was recorded with different settings')
+    print_results(results, baseline)
+    if arguments.save:
+        arguments.save.write_text(json.dumps(results, indent=2))
+        print(f'\nsaved baseline to {arguments.save}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())